@@ -16,6 +16,7 @@ from app_config import (
 )
 from database import init_db, get_db_connection
 from hydrus_interface import call_hydrus_api # For initial service fetch
+from json_provider import OrjsonProvider, orjson
 from views import views_bp # Import the Blueprint from the views package
 from scheduler_tasks import scheduler, schedule_rules_tick_job as schedule_job_from_tasks_module, schedule_log_pruning_job
 
@@ -84,6 +85,9 @@ def create_app():
     app = Flask(__name__,
                 template_folder=os.path.join(PROJECT_ROOT_DIR, 'templates'),
                 static_folder=os.path.join(PROJECT_ROOT_DIR, 'static'))
+    if orjson:
+        # Faster jsonify() for the services, status and log endpoints; same output as the default.
+        app.json = OrjsonProvider(app)
 
     logger.info(f"Project root determined as: {PROJECT_ROOT_DIR}")
     logger.info(f"Static folder set to: {app.static_folder}")
@@ -141,6 +145,8 @@ def create_app():
     logger.info("Views blueprint registered.")
 
     # Initialize Scheduler
+    # Never run two instances of a job at once, and fold missed runs into one.
+    app.config['SCHEDULER_JOB_DEFAULTS'] = {'coalesce': True, 'max_instances': 1}
     scheduler.init_app(app)
     logger.info("APScheduler initialized with Flask app.")
 
@@ -2,6 +2,7 @@ import os
 import json
 import secrets
 import logging
+import sqlite3
 import database
 
 # from functools import cmp_to_key # No longer needed
@@ -33,7 +34,8 @@ DEFAULT_SETTINGS = {
     'force_in_run_on_startup': True,
     'force_in_run_on_all_local': False,
     'force_in_periodic_run_frequency': 0,
-    'enable_log_pruning': True
+    'enable_log_pruning': True,
+    'action_batch_size': 256
 }
 
 
@@ -176,6 +178,14 @@ def load_settings():
         logger.warning("Invalid value for force_in_periodic_run_frequency. Using default.")
         final_settings['force_in_periodic_run_frequency'] = DEFAULT_SETTINGS['force_in_periodic_run_frequency']
 
+    try:
+        final_settings['action_batch_size'] = int(final_settings.get('action_batch_size', DEFAULT_SETTINGS['action_batch_size']))
+        if final_settings['action_batch_size'] < 1:
+             final_settings['action_batch_size'] = DEFAULT_SETTINGS['action_batch_size']
+    except (ValueError, TypeError):
+        logger.warning("Invalid value for action_batch_size. Using default.")
+        final_settings['action_batch_size'] = DEFAULT_SETTINGS['action_batch_size']
+
     if not isinstance(final_settings.get('theme'), str):
         logger.warning(f"Invalid type for theme. Using default '{DEFAULT_SETTINGS['theme']}'.")
         final_settings['theme'] = DEFAULT_SETTINGS['theme']
@@ -209,6 +219,7 @@ def load_settings():
         'force_in_run_on_all_local' not in settings or
         'force_in_periodic_run_frequency' not in settings or
         'enable_log_pruning' not in settings or
+        'action_batch_size' not in settings or
         'background_image' not in settings or
         'available_backgrounds' not in settings or settings.get('available_backgrounds') != final_settings.get('available_backgrounds')
     )
@@ -341,12 +352,38 @@ def _sort_rules_for_execution(rules):
     return sorted_rules
 
 
+# Last result of _load_and_merge_rules, as ((rules_version, rules.json mtime_ns, size), rules).
+_merged_rules_cache = (None, [])
+
 def load_rules(db_conn):
     """
     Loads rule definitions from rules.json, merges them with metadata from the database
     (like scheduling and creation_timestamp), and sorts them for execution.
+    The merged list is reused until rules.json or the rules table changes; callers get a
+    new list of shallow-copied rule dicts.
     NOTE: This function now requires a database connection.
     """
+    global _merged_rules_cache
+    try:
+        # The version is read before the rules, so a write landing in between can only
+        # leave the cached list newer than its key (forcing a reload), never older.
+        rules_version = database.get_app_state(db_conn, database.RULES_VERSION_STATE_KEY)
+        stat_result = os.stat(RULES_FILE)
+        cache_key = (rules_version, stat_result.st_mtime_ns, stat_result.st_size)
+    except (OSError, sqlite3.Error):
+        cache_key = None
+
+    cached_key, merged_rules = _merged_rules_cache
+    if cache_key is None or cache_key != cached_key:
+        merged_rules = _load_and_merge_rules(db_conn)
+        # Empty results include the error paths, which shouldn't stick until the next write.
+        _merged_rules_cache = (cache_key, merged_rules) if cache_key is not None and merged_rules else (None, [])
+
+    return [dict(rule) for rule in merged_rules]
+
+
+def _load_and_merge_rules(db_conn):
+    """Does the uncached work of load_rules."""
     logger.info("--- Loading and sorting rules ---")
     
     # 1. Load core rule definitions from JSON file
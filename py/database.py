@@ -1,7 +1,9 @@
 import os
+import queue
 import sqlite3
 import json
 import logging
+from contextlib import contextmanager
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -10,6 +12,30 @@ BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DB_DIR = os.path.join(BASE_DIR, 'db')
 AUTOMATION_DB_FILE = os.path.join(DB_DIR, 'automation_state.db')
 
+# Which run_logs rows count toward the log stats page's success totals ({row} is NEW or OLD in triggers).
+_RUN_LOG_STATS_CONDITION = "{row}.status IN ('success_completed', 'failure_critical') AND {row}.actions_succeeded_count > 0"
+
+def _counts_toward_stats(row):
+    return _RUN_LOG_STATS_CONDITION.format(row=row)
+
+# Trigger statements that move one run_logs row's contribution in or out of run_log_stats_by_rule.
+_ADD_TO_RUN_LOG_STATS_SQL = f'''
+    INSERT INTO run_log_stats_by_rule (rule_name, total_success_count)
+    SELECT NEW.rule_name, NEW.actions_succeeded_count WHERE {_counts_toward_stats('NEW')}
+    ON CONFLICT(rule_name) DO UPDATE SET total_success_count = total_success_count + excluded.total_success_count;'''
+_SUBTRACT_FROM_RUN_LOG_STATS_SQL = f'''
+    UPDATE run_log_stats_by_rule SET total_success_count = total_success_count - OLD.actions_succeeded_count
+    WHERE rule_name = OLD.rule_name AND {_counts_toward_stats('OLD')};
+    DELETE FROM run_log_stats_by_rule WHERE rule_name = OLD.rule_name AND total_success_count <= 0;'''
+
+# app_state key bumped by triggers on every write to the rules table, so cached copies
+# of the merged rule list can tell when they're stale.
+RULES_VERSION_STATE_KEY = 'rules_version'
+
+_BUMP_RULES_VERSION_SQL = f'''
+    INSERT INTO app_state (key, value) VALUES ('{RULES_VERSION_STATE_KEY}', '1')
+    ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1;'''
+
 def init_db():
     """
     Initializes the database schema with all required tables and indexes.
@@ -25,6 +51,13 @@ def init_db():
         conn = sqlite3.connect(AUTOMATION_DB_FILE)
         cursor = conn.cursor()
 
+        # WAL is a property of the database file, so it only needs setting once, here;
+        # every later connection picks it up. It lets the scheduler's writes proceed
+        # alongside UI reads.
+        journal_mode = cursor.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            logger.warning(f"Could not switch {AUTOMATION_DB_FILE} to WAL mode (journal_mode is '{journal_mode}').")
+
         # Table for a simple registry of all known rules.
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS rules (
@@ -62,6 +95,8 @@ def init_db():
                 PRIMARY KEY (rule_id, set_id)
             )
         ''')
+        # The primary key leads with rule_id; per-set lookups and deletes need their own index.
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_rule_set_associations_set_id ON rule_set_associations (set_id)')
         logger.info("Table 'rule_set_associations' initialized/verified.")
 
         # Table for run-level summary logs.
@@ -83,8 +118,54 @@ def init_db():
                 details_json TEXT
             )
         ''')
+        # Serves the time-ordered run log listing and its keyset pagination.
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_run_logs_start_time ON run_logs (start_time, run_log_id)')
+        # Covers the bounded-time-frame stats query: rows with no successes are left out of the index.
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_run_logs_stats_cover
+            ON run_logs (status, start_time, rule_name, actions_succeeded_count)
+            WHERE actions_succeeded_count > 0
+        ''')
         logger.info("Table 'run_logs' (for run summaries) initialized/verified.")
 
+        # All-time success totals per rule for the log stats page, kept in step with run_logs by
+        # triggers and rebuilt here on startup so it can't drift from the source table.
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS run_log_stats_by_rule (
+                rule_name TEXT PRIMARY KEY,
+                total_success_count INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_run_log_stats_insert AFTER INSERT ON run_logs
+            WHEN {_counts_toward_stats('NEW')}
+            BEGIN
+                {_ADD_TO_RUN_LOG_STATS_SQL}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_run_log_stats_update
+            AFTER UPDATE OF rule_name, status, actions_succeeded_count ON run_logs
+            BEGIN
+                {_SUBTRACT_FROM_RUN_LOG_STATS_SQL}
+                {_ADD_TO_RUN_LOG_STATS_SQL}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_run_log_stats_delete AFTER DELETE ON run_logs
+            BEGIN
+                {_SUBTRACT_FROM_RUN_LOG_STATS_SQL}
+            END
+        ''')
+        cursor.execute("DELETE FROM run_log_stats_by_rule")
+        cursor.execute(f'''
+            INSERT INTO run_log_stats_by_rule (rule_name, total_success_count)
+            SELECT rule_name, SUM(actions_succeeded_count) FROM run_logs
+            WHERE {_counts_toward_stats('run_logs')}
+            GROUP BY rule_name
+        ''')
+        logger.info("Table 'run_log_stats_by_rule' (all-time log stats) initialized/verified.")
+
         # Table for detailed, file-level action history.
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS logs (
@@ -124,6 +205,14 @@ def init_db():
         ''')
         logger.info("Table 'app_state' (for key-value state) initialized/verified.")
 
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_rules_version_{event.lower()} AFTER {event} ON rules
+                BEGIN
+                    {_BUMP_RULES_VERSION_SQL}
+                END
+            ''')
+
         conn.commit()
         logger.info(f"Database schema initialized/verified at {AUTOMATION_DB_FILE}")
 
@@ -136,16 +225,77 @@ def init_db():
         logger.info("--- Finished Initializing Database ---")
 
 
-def get_db_connection(db_file=AUTOMATION_DB_FILE):
+# Maximum number of values bound into a single "IN (...)" clause. Kept below SQLite's
+# historical 999-variable limit.
+SQL_IN_CHUNK_SIZE = 500
+
+# Per-connection tuning, applied once when a connection is opened (pooled connections
+# keep it). synchronous=NORMAL is the recommended durability level under WAL, which
+# init_db enables on the database file itself.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+def get_db_connection(db_file=AUTOMATION_DB_FILE, check_same_thread=True):
     """Establishes and returns a database connection."""
     try:
-        conn = sqlite3.connect(db_file, timeout=30.0)
+        conn = sqlite3.connect(db_file, timeout=30.0, check_same_thread=check_same_thread)
         conn.row_factory = sqlite3.Row
-        return conn
     except sqlite3.Error as e:
         logger.error(f"Error connecting to database {db_file}: {e}")
         raise
 
+    for pragma in CONNECTION_PRAGMAS:
+        try:
+            conn.execute(pragma)
+        except sqlite3.Error as e:
+            # Tuning is best-effort; the connection is still usable without it.
+            logger.warning(f"Could not apply '{pragma}' to {db_file}: {e}")
+    return conn
+
+
+# Idle connections to the automation DB kept open for reuse by short-lived callers
+# (scheduler ticks, per-rule executions, view helpers), so each one skips the
+# connect + PRAGMA setup.
+DB_POOL_SIZE = 10
+_connection_pool = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+def acquire_connection():
+    """
+    Takes an idle connection to the automation DB from the pool, or opens a new one.
+
+    Pooled connections are opened with check_same_thread=False because a connection
+    released by the scheduler thread may next be used by a request thread; each one
+    is only ever used by one caller at a time. Pair every call with release_connection().
+    """
+    try:
+        return _connection_pool.get_nowait()
+    except queue.Empty:
+        return get_db_connection(check_same_thread=False)
+
+def release_connection(conn):
+    """
+    Returns a connection from acquire_connection() to the pool.
+    Any transaction the caller left open is rolled back first; if the pool is
+    already full (or the rollback fails) the connection is closed instead.
+    """
+    try:
+        conn.rollback()
+        _connection_pool.put_nowait(conn)
+    except (sqlite3.Error, queue.Full):
+        conn.close()
+
+@contextmanager
+def pooled_connection():
+    """Context-manager form of acquire_connection()/release_connection()."""
+    conn = acquire_connection()
+    try:
+        yield conn
+    finally:
+        release_connection(conn)
+
 
 def start_run_log(db_conn, run_log_id, parent_run_id, rule, execution_order):
     """Logs the start of a new rule execution in the summary table."""
@@ -202,13 +352,14 @@ def get_rules_first_run_status(db_conn, rule_ids):
     if not rule_ids:
         return statuses
 
-    placeholders = ','.join('?' for _ in rule_ids)
-    query = f"SELECT rule_id, has_been_run FROM rules WHERE rule_id IN ({placeholders})"
-    
+    # One IN query per chunk keeps large lists under SQLite's bound-parameter limit.
     cursor = db_conn.cursor()
-    cursor.execute(query, rule_ids)
-    
-    results = {row['rule_id']: bool(row['has_been_run']) for row in cursor.fetchall()}
+    results = {}
+    for start in range(0, len(rule_ids), SQL_IN_CHUNK_SIZE):
+        chunk = rule_ids[start:start + SQL_IN_CHUNK_SIZE]
+        placeholders = ','.join('?' for _ in chunk)
+        cursor.execute(f"SELECT rule_id, has_been_run FROM rules WHERE rule_id IN ({placeholders})", chunk)
+        results.update((row['rule_id'], bool(row['has_been_run'])) for row in cursor.fetchall())
     
     # The API expects a dictionary of {rule_id: needs_first_run_bool}
     # A rule needs its first run if its `has_been_run` flag is False (0).
@@ -225,77 +376,98 @@ def clear_rule_from_file_state(db_conn, edited_rule_id, edited_rule_old_type, ed
     Finds all files affected by a changed/deleted rule and removes its influence from the state table.
     This prevents outdated overrides from persisting.
     """
-    old_type = edited_rule_old_type
-    old_dest = edited_rule_old_destination
+    return clear_rule_from_file_state_bulk(db_conn, [(edited_rule_id, edited_rule_old_type, edited_rule_old_destination)])
+
+
+def clear_rule_from_file_state_bulk(db_conn, clears):
+    """
+    Bulk version of clear_rule_from_file_state for a list of (rule_id, old_type, old_destination) tuples.
+    Each rule's affected files are fetched once, every destination is applied in memory, and all
+    rows are written back with a single executemany and one commit.
+    """
+    destinations_by_rule = {}
+    for rule_id, old_type, old_dest in clears:
+        destinations_by_rule.setdefault(rule_id, []).append((old_type, old_dest))
+    if not destinations_by_rule:
+        return 0
+
+    logger.info(f"Clearing state for {len(destinations_by_rule)} rule(s) across {len(clears)} destination(s).")
 
-    logger.info(f"Clearing state for rule '{edited_rule_id}' (Old Type: {old_type}, Old Dest: {old_dest})")
-    
     cursor = db_conn.cursor()
     try:
-        cursor.execute(
-            "SELECT * FROM files WHERE rules_in_application LIKE ?",
-            (f'%"{edited_rule_id}"%',)
-        )
-        affected_files = cursor.fetchall()
-        logger.info(f"Found {len(affected_files)} file states to clean for rule '{edited_rule_id}'.")
-
-        if not affected_files:
+        # file_hash -> [rules_app, force_in_gov, placements, rating_services, rating_gov]
+        pending_states = {}
+        for rule_id, destinations in destinations_by_rule.items():
+            cursor.execute(
+                "SELECT * FROM files WHERE rules_in_application LIKE ?",
+                (f'%"{rule_id}"%',)
+            )
+            affected_files = cursor.fetchall()
+            logger.info(f"Found {len(affected_files)} file states to clean for rule '{rule_id}'.")
+
+            for row in affected_files:
+                state = pending_states.get(row['file_hash'])
+                if state is None:
+                    state = pending_states[row['file_hash']] = [
+                        json.loads(row['rules_in_application']),
+                        row['force_in_priority_governance'],
+                        json.loads(row['correct_placement']),
+                        json.loads(row['affected_rating_services']),
+                        json.loads(row['rating_priority_governance']),
+                    ]
+                rules_app, _, placements, rating_services, rating_gov = state
+
+                if rule_id in rules_app:
+                    rules_app.remove(rule_id)
+
+                for old_type, old_dest in destinations:
+                    if old_type == 'rating':
+                        if old_dest in rating_services:
+                            rating_services.remove(old_dest)
+                        if old_dest in rating_gov:
+                            del rating_gov[old_dest]
+
+                    elif old_type == 'force_in':
+                        if old_dest in placements:
+                            placements.remove(old_dest)
+                        state[1] = -1
+
+                    elif old_type == 'add_to':
+                        if old_dest in placements:
+                            placements.remove(old_dest)
+
+        if not pending_states:
             return 0
 
-        updated_count = 0
-        for row in affected_files:
-            file_hash = row['file_hash']
-            
-            rules_app = json.loads(row['rules_in_application'])
-            placements = json.loads(row['correct_placement'])
-            rating_services = json.loads(row['affected_rating_services'])
-            rating_gov = json.loads(row['rating_priority_governance'])
-            force_in_gov = row['force_in_priority_governance']
-
-            if edited_rule_id in rules_app:
-                rules_app.remove(edited_rule_id)
-
-            if old_type == 'rating':
-                if old_dest in rating_services:
-                    rating_services.remove(old_dest)
-                if old_dest in rating_gov:
-                    del rating_gov[old_dest]
-            
-            elif old_type == 'force_in':
-                if old_dest in placements:
-                    placements.remove(old_dest)
-                force_in_gov = -1
-
-            elif old_type == 'add_to':
-                if old_dest in placements:
-                    placements.remove(old_dest)
-
-            cursor.execute('''
-                UPDATE files SET
-                    rules_in_application = ?,
-                    force_in_priority_governance = ?,
-                    correct_placement = ?,
-                    affected_rating_services = ?,
-                    rating_priority_governance = ?,
-                    last_updated = ?
-                WHERE file_hash = ?
-            ''', (
+        now_iso = datetime.utcnow().isoformat() + "Z"
+        cursor.executemany('''
+            UPDATE files SET
+                rules_in_application = ?,
+                force_in_priority_governance = ?,
+                correct_placement = ?,
+                affected_rating_services = ?,
+                rating_priority_governance = ?,
+                last_updated = ?
+            WHERE file_hash = ?
+        ''', [
+            (
                 json.dumps(rules_app),
                 force_in_gov,
                 json.dumps(placements),
                 json.dumps(rating_services),
                 json.dumps(rating_gov),
-                datetime.utcnow().isoformat() + "Z",
+                now_iso,
                 file_hash
-            ))
-            updated_count += 1
-        
+            )
+            for file_hash, (rules_app, force_in_gov, placements, rating_services, rating_gov) in pending_states.items()
+        ])
+
         db_conn.commit()
-        logger.info(f"Successfully cleaned state for {updated_count} files for rule '{edited_rule_id}'.")
-        return updated_count
+        logger.info(f"Successfully cleaned state for {len(pending_states)} files.")
+        return len(pending_states)
 
     except (json.JSONDecodeError, sqlite3.Error, TypeError) as e:
-        logger.error(f"Failed to clear state for rule '{edited_rule_id}'. Rolling back. Error: {e}", exc_info=True)
+        logger.error(f"Failed to clear state for rules {list(destinations_by_rule)}. Rolling back. Error: {e}", exc_info=True)
         db_conn.rollback()
         return -1
 
@@ -359,6 +531,30 @@ def get_rules(db_conn):
     return [dict(row) for row in cursor.fetchall()]
 
 
+_SAVE_RULE_SQL = '''
+    INSERT INTO rules (
+        rule_id, rule_name, execution_override, interval_seconds, force_in_check_frequency,
+        force_in_check_interval_runs
+    ) VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(rule_id) DO UPDATE SET
+        rule_name = excluded.rule_name,
+        execution_override = excluded.execution_override,
+        interval_seconds = excluded.interval_seconds,
+        force_in_check_frequency = excluded.force_in_check_frequency,
+        force_in_check_interval_runs = excluded.force_in_check_interval_runs
+'''
+
+def _rule_row(rule_data):
+    """The _SAVE_RULE_SQL parameters for one rule dict."""
+    return (
+        rule_data.get('id'),
+        rule_data.get('name'),
+        rule_data.get('execution_override'),
+        rule_data.get('interval_seconds'),
+        rule_data.get('force_in_check_frequency', 'first_run_only'),
+        rule_data.get('force_in_check_interval_runs') # Get new field for the interval number
+    )
+
 def save_rule(db_conn, rule_data):
     """
     Saves a single rule's properties to the database.
@@ -366,27 +562,13 @@ def save_rule(db_conn, rule_data):
     It specifically handles scheduling and the new force_in frequency.
     """
     cursor = db_conn.cursor()
-    cursor.execute('''
-        INSERT INTO rules (
-            rule_id, rule_name, execution_override, interval_seconds, force_in_check_frequency,
-            force_in_check_interval_runs
-        ) VALUES (?, ?, ?, ?, ?, ?)
-        ON CONFLICT(rule_id) DO UPDATE SET
-            rule_name = excluded.rule_name,
-            execution_override = excluded.execution_override,
-            interval_seconds = excluded.interval_seconds,
-            force_in_check_frequency = excluded.force_in_check_frequency,
-            force_in_check_interval_runs = excluded.force_in_check_interval_runs
-    ''', (
-        rule_data.get('id'),
-        rule_data.get('name'),
-        rule_data.get('execution_override'),
-        rule_data.get('interval_seconds'),
-        rule_data.get('force_in_check_frequency', 'first_run_only'),
-        rule_data.get('force_in_check_interval_runs') # Get new field for the interval number
-    ))
+    cursor.execute(_SAVE_RULE_SQL, _rule_row(rule_data))
     # Note: Commit is no longer done here, it will be handled by the calling function
     # to ensure atomicity across multiple operations (e.g., creating copies).
+
+def save_rules(db_conn, rules_data):
+    """Batched form of save_rule(): upserts every rule in `rules_data` with one executemany() call. Does not commit."""
+    db_conn.executemany(_SAVE_RULE_SQL, [_rule_row(rule_data) for rule_data in rules_data])
     
 def increment_rule_run_count(db_conn, rule_id):
     """Increments the run_count for a specific rule by 1."""
@@ -449,23 +631,16 @@ def save_set_configuration(db_conn, data):
         cursor.execute("DELETE FROM rule_sets")
 
         # Insert new set definitions
-        for s in data.get('sets', []):
-            cursor.execute(
-                "INSERT INTO rule_sets (id, name, execution_override, interval_seconds) VALUES (?, ?, ?, ?)",
-                (
-                    s['id'],
-                    s['name'],
-                    s.get('execution_override'),
-                    s.get('interval_seconds')
-                )
-            )
+        cursor.executemany(
+            "INSERT INTO rule_sets (id, name, execution_override, interval_seconds) VALUES (?, ?, ?, ?)",
+            ((s['id'], s['name'], s.get('execution_override'), s.get('interval_seconds')) for s in data.get('sets', []))
+        )
 
         # Insert new associations
-        for assoc in data.get('associations', []):
-            cursor.execute(
-                "INSERT INTO rule_set_associations (rule_id, set_id) VALUES (?, ?)",
-                (assoc['rule_id'], assoc['set_id'])
-            )
+        cursor.executemany(
+            "INSERT INTO rule_set_associations (rule_id, set_id) VALUES (?, ?)",
+            ((assoc['rule_id'], assoc['set_id']) for assoc in data.get('associations', []))
+        )
 
         db_conn.commit()
         logger.info(f"Successfully saved set configuration. {len(data.get('sets', []))} sets, {len(data.get('associations', []))} associations.")
@@ -478,34 +653,57 @@ def save_set_configuration(db_conn, data):
 
 def remove_rule_from_set(db_conn, rule_id, set_id):
     """Removes a single, specific association between a rule and a set."""
+    remove_rules_from_sets(db_conn, [(rule_id, set_id)])
+
+
+def remove_rules_from_sets(db_conn, pairs):
+    """
+    Removes several (rule_id, set_id) associations in one transaction.
+    Returns the number of associations removed.
+    """
+    pairs = list(pairs)
     cursor = db_conn.cursor()
     try:
-        cursor.execute(
+        cursor.executemany(
             "DELETE FROM rule_set_associations WHERE rule_id = ? AND set_id = ?",
-            (rule_id, set_id)
+            pairs
         )
+        removed_count = cursor.rowcount
         db_conn.commit()
-        logger.info(f"DB operation to remove association between rule '{rule_id}' and set '{set_id}' executed and committed.")
+        logger.info(f"DB operation to remove {len(pairs)} rule/set association(s) executed and committed ({removed_count} removed).")
+        return removed_count
     except sqlite3.Error as e:
         db_conn.rollback()
-        logger.error(f"Failed to execute DB operation to remove association between rule '{rule_id}' and set '{set_id}'. Rolling back. Error: {e}")
+        logger.error(f"Failed to execute DB operation to remove rule/set associations {pairs}. Rolling back. Error: {e}")
         raise
 
 
 def delete_set(db_conn, set_id):
     """Deletes a set and its associations from the database."""
+    delete_sets(db_conn, [set_id])
+
+
+def delete_sets(db_conn, set_ids):
+    """
+    Deletes several sets and their associations in one transaction.
+    Returns the number of sets deleted.
+    """
+    rows = [(set_id,) for set_id in set_ids]
     cursor = db_conn.cursor()
     try:
-        # The ON DELETE CASCADE on the foreign key in rule_set_associations
-        # handles deleting the associations automatically.
-        cursor.execute("DELETE FROM rule_sets WHERE id = ?", (set_id,))
+        # Connections don't enable foreign_keys, so ON DELETE CASCADE never fires;
+        # the associations are cleared explicitly.
+        cursor.executemany("DELETE FROM rule_set_associations WHERE set_id = ?", rows)
+        cursor.executemany("DELETE FROM rule_sets WHERE id = ?", rows)
+        deleted_count = cursor.rowcount
         db_conn.commit()
-        logger.info(f"Successfully deleted set with id '{set_id}'.")
+        logger.info(f"Successfully deleted {deleted_count} set(s) with ids {[row[0] for row in rows]}.")
+        return deleted_count
     except sqlite3.Error as e:
         db_conn.rollback()
-        logger.error(f"Failed to delete set '{set_id}'. Transaction rolled back. Error: {e}")
+        logger.error(f"Failed to delete sets {[row[0] for row in rows]}. Transaction rolled back. Error: {e}")
         raise
-        
+
 def get_app_state(db_conn, key, default=None):
     """Fetches a value from the app_state key-value table."""
     cursor = db_conn.cursor()
@@ -513,6 +711,21 @@ def get_app_state(db_conn, key, default=None):
     row = cursor.fetchone()
     return row['value'] if row else default
 
+def get_app_states(db_conn, keys):
+    """
+    Fetches several app_state values in one query per chunk of keys.
+    Returns a dictionary mapping each key that has a row to its value.
+    """
+    keys = list(keys)
+    states = {}
+    cursor = db_conn.cursor()
+    for start in range(0, len(keys), SQL_IN_CHUNK_SIZE):
+        chunk = keys[start:start + SQL_IN_CHUNK_SIZE]
+        placeholders = ','.join('?' for _ in chunk)
+        cursor.execute(f"SELECT key, value FROM app_state WHERE key IN ({placeholders})", chunk)
+        states.update((row['key'], row['value']) for row in cursor.fetchall())
+    return states
+
 def set_app_state(db_conn, key, value):
     """Sets a value in the app_state key-value table."""
     cursor = db_conn.cursor()
@@ -521,6 +734,26 @@ def set_app_state(db_conn, key, value):
         (key, str(value)) # Ensure value is stored as text
     )
 
+def set_app_states(db_conn, items):
+    """Sets several app_state values with one executemany() call. `items` is an iterable of (key, value) pairs."""
+    db_conn.executemany(
+        "INSERT OR REPLACE INTO app_state (key, value) VALUES (?, ?)",
+        ((key, str(value)) for key, value in items)
+    )
+
+def get_custom_interval_flags(db_conn):
+    """
+    Reports whether any rule and whether any set has a 'custom' execution_override.
+    Returns a tuple of (has_custom_rule_interval, has_custom_set_interval) from two
+    EXISTS checks, so callers don't need to load every rule and set to find out.
+    """
+    row = db_conn.execute('''
+        SELECT
+            EXISTS(SELECT 1 FROM rules WHERE execution_override = 'custom'),
+            EXISTS(SELECT 1 FROM rule_sets WHERE execution_override = 'custom')
+    ''').fetchone()
+    return bool(row[0]), bool(row[1])
+
 def get_last_run_timestamp_for_rule(db_conn, rule_id):
     """
     Gets the last run time for a rule directly from the run_logs table.
@@ -532,4 +765,23 @@ def get_last_run_timestamp_for_rule(db_conn, rule_id):
         (rule_id,)
     )
     row = cursor.fetchone()
-    return row[0] if row and row[0] else None
\ No newline at end of file
+    return row[0] if row and row[0] else None
+
+def get_last_run_timestamps_for_rules(db_conn, rule_ids):
+    """
+    Batched form of get_last_run_timestamp_for_rule().
+    Returns a dictionary mapping rule_id to its latest run_logs start_time; rules
+    that have never run are absent from the result.
+    """
+    rule_ids = list(rule_ids)
+    timestamps = {}
+    cursor = db_conn.cursor()
+    for start in range(0, len(rule_ids), SQL_IN_CHUNK_SIZE):
+        chunk = rule_ids[start:start + SQL_IN_CHUNK_SIZE]
+        placeholders = ','.join('?' for _ in chunk)
+        cursor.execute(
+            f"SELECT rule_id, MAX(start_time) FROM run_logs WHERE rule_id IN ({placeholders}) GROUP BY rule_id",
+            chunk
+        )
+        timestamps.update((row[0], row[1]) for row in cursor.fetchall() if row[1])
+    return timestamps
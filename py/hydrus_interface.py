@@ -3,6 +3,11 @@ import json
 import sys # For sys.stdout.encoding
 import logging
 
+try:
+    import orjson # Optional: decodes large search responses (long hash lists) much faster
+except ImportError:
+    orjson = None
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -48,7 +53,8 @@ def call_hydrus_api(api_address, api_key, endpoint, method='GET', params=None, j
         content_type = response.headers.get('Content-Type', '').lower()
         if response.content and 'application/json' in content_type:
             try:
-                data = response.json()
+                # orjson.JSONDecodeError subclasses json.JSONDecodeError, so one handler covers both.
+                data = orjson.loads(response.content) if orjson else response.json()
                 return {"success": True, "data": data}, response.status_code
             except json.JSONDecodeError as jde:
                 logger.warning(f"API call to {endpoint} successful (status {response.status_code}), but response is not valid JSON. Error: {jde}")
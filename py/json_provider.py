@@ -0,0 +1,57 @@
+"""
+Flask JSON provider backed by orjson.
+
+Installed on the app in create_app() when orjson is available, so every jsonify()
+response is encoded straight to UTF-8 bytes by orjson instead of the stdlib json module.
+Output matches Flask's DefaultJSONProvider: keys are sorted, and dates, UUIDs, decimals
+and dataclasses go through the same `default` hook.
+"""
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """DefaultJSONProvider that serialises with orjson, falling back to the stdlib for anything orjson rejects."""
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _dumps_bytes(self, obj):
+        """Encodes obj with orjson, or returns None if orjson can't (e.g. integers wider than 64 bits)."""
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._orjson_options())
+        except TypeError:
+            return None
+
+    def dumps(self, obj, **kwargs):
+        # Callers asking for specific json.dumps() options get the stdlib behaviour.
+        if not kwargs:
+            encoded = self._dumps_bytes(obj)
+            if encoded is not None:
+                return encoded.decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Pretty-printed (debug) responses keep the stdlib path and its indentation.
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        encoded = self._dumps_bytes(self._prepare_response_obj(args, kwargs))
+        if encoded is None:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(encoded + b"\n", mimetype=self.mimetype)
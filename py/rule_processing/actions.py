@@ -10,14 +10,22 @@ search and filtering logic is complete.
 """
 
 import json
+import time
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional
 
 from hydrus_interface import call_hydrus_api
 from .context import RuleExecutionContext
 
 logger = logging.getLogger(__name__)
 
+# How long a failed /get_services fetch is remembered before Hydrus is asked again.
+# Successful fetches are kept in app_config['AVAILABLE_SERVICES'] instead.
+SERVICES_FAILURE_CACHE_TTL_SECONDS = 5
+
+# Maps (api_address, api_key) -> monotonic time of the last failed fetch.
+_failed_services_fetches: Dict[Tuple[str, str], float] = {}
+
 
 def batch_api_call_with_retry(
     ctx: RuleExecutionContext,
@@ -47,9 +55,7 @@ def batch_api_call_with_retry(
     Returns:
         A dictionary with 'successful_items' and 'failed_items_with_errors'.
     """
-    settings = ctx.app_config.get('HYDRUS_SETTINGS', {})
-    api_address = settings.get('hydrus_api_url') or settings.get('api_address')
-    api_key = settings.get('hydrus_api_key') or settings.get('api_key')
+    api_address, api_key = ctx.api_address, ctx.api_key
 
     successful_items = []
     failed_items_with_errors = []
@@ -106,22 +112,47 @@ def ensure_services_are_loaded(ctx: RuleExecutionContext) -> List[Dict[str, Any]
     Ensures Hydrus services list is loaded, fetching if necessary.
     Uses app_config for HYDRUS_SETTINGS and to cache AVAILABLE_SERVICES.
     """
-    available_services_cache = ctx.app_config.get('AVAILABLE_SERVICES')
-    if isinstance(available_services_cache, list) and available_services_cache:
-        return available_services_cache
+    return load_available_services(ctx.app_config, ctx.api_address, ctx.api_key, f"Rule '{ctx.rule_name}'")
 
-    log_prefix = f"Rule '{ctx.rule_name}'"
-    logger.info(f"{log_prefix}: Available services cache empty or invalid. Attempting to fetch.")
 
-    settings = ctx.app_config.get('HYDRUS_SETTINGS', {})
-    api_address = settings.get('hydrus_api_url') or settings.get('api_address')
-    api_key = settings.get('hydrus_api_key') or settings.get('api_key')
+def load_available_services(app_config: Dict[str, Any], api_address: Optional[str], api_key: Optional[str],
+                            log_prefix: str, use_cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    The context-free core of ensure_services_are_loaded(), for callers that are not
+    executing a rule (e.g. the settings page). Caches the result in app_config['AVAILABLE_SERVICES'].
+    Pass use_cache=False to ignore both caches and always ask Hydrus (e.g. after the
+    API settings change).
+    """
+    available_services_cache = app_config.get('AVAILABLE_SERVICES')
+    if use_cache and isinstance(available_services_cache, list) and available_services_cache:
+        return available_services_cache
 
     if not api_address:
         logger.warning(f"{log_prefix}: Hydrus API address not configured. Cannot fetch services.")
-        ctx.app_config['AVAILABLE_SERVICES'] = []
+        app_config['AVAILABLE_SERVICES'] = []
         return []
 
+    # Only failures are cached here: a recent failed fetch with the same credentials is
+    # not retried, so a multi-rule run against an unreachable client does not retry
+    # once per rule.
+    cache_key = (api_address, api_key)
+    failed_at = _failed_services_fetches.get(cache_key) if use_cache else None
+    if failed_at is not None and time.monotonic() - failed_at < SERVICES_FAILURE_CACHE_TTL_SECONDS:
+        app_config['AVAILABLE_SERVICES'] = []
+        return []
+
+    logger.info(f"{log_prefix}: Available services cache empty or invalid. Attempting to fetch.")
+    services_list = _fetch_services_from_hydrus(api_address, api_key, log_prefix)
+    _failed_services_fetches.clear()  # Only the current credentials are worth keeping
+    if not services_list:
+        _failed_services_fetches[cache_key] = time.monotonic()
+
+    app_config['AVAILABLE_SERVICES'] = services_list
+    return services_list
+
+
+def _fetch_services_from_hydrus(api_address: str, api_key: str, log_prefix: str) -> List[Dict[str, Any]]:
+    """Fetches /get_services and flattens it into a list of service dicts. Returns [] on failure."""
     services_result, _ = call_hydrus_api(api_address, api_key, '/get_services')
 
     if services_result.get("success"):
@@ -140,7 +171,6 @@ def ensure_services_are_loaded(ctx: RuleExecutionContext) -> List[Dict[str, Any]
                         })
                     else:
                         logger.warning(f"{log_prefix}: Service details for key '{key}' not a dict. Skipping.")
-                ctx.app_config['AVAILABLE_SERVICES'] = services_list
                 logger.info(f"{log_prefix}: Fetched and cached {len(services_list)} services.")
                 return services_list
             else:
@@ -150,7 +180,6 @@ def ensure_services_are_loaded(ctx: RuleExecutionContext) -> List[Dict[str, Any]
     else:
         logger.error(f"{log_prefix} failed: API call /get_services: {services_result.get('message', 'Unknown API error')}")
 
-    ctx.app_config['AVAILABLE_SERVICES'] = []
     return []
 
 
@@ -164,9 +193,7 @@ def fetch_metadata(ctx: RuleExecutionContext, hashes_list: List[str], batch_size
         return [], []
 
     logger.info(f"Rule '{ctx.rule_name}': Fetching metadata for {num_hashes} files (batch size {batch_size}).")
-    settings = ctx.app_config.get('HYDRUS_SETTINGS', {})
-    api_address = settings.get('hydrus_api_url') or settings.get('api_address')
-    api_key = settings.get('hydrus_api_key') or settings.get('api_key')
+    api_address, api_key = ctx.api_address, ctx.api_key
 
     if not api_address:
         logger.error(f"Rule '{ctx.rule_name}': API address not set for metadata fetch.")
@@ -358,9 +385,7 @@ def manage_tags(ctx: RuleExecutionContext, file_hashes: List[str], tag_service_k
     if not tag_service_key: return {"success": False, "message": "Tag service key missing.", "files_processed_count": 0, "errors": ["Missing tag_service_key."]}
     if not tags_to_process: return {"success": True, "message": "No tags specified.", "files_processed_count": len(file_hashes), "errors": []}
 
-    settings = ctx.app_config.get('HYDRUS_SETTINGS', {})
-    api_address = settings.get('hydrus_api_url') or settings.get('api_address')
-    api_key = settings.get('hydrus_api_key') or settings.get('api_key')
+    api_address, api_key = ctx.api_address, ctx.api_key
     if not api_address: return {"success": False, "message": "API address not set for tag action.", "files_processed_count": 0, "errors": ["API address not configured."]}
 
     action_str = "add" if action_mode == 0 else "remove"
@@ -387,9 +412,7 @@ def modify_rating(ctx: RuleExecutionContext, file_hash: str, rating_service_key:
     if not file_hash: return {"success": False, "message": "File hash missing for rating.", "errors": ["File hash missing."]}
     if not rating_service_key: return {"success": False, "message": "Rating service key missing.", "errors": ["Rating service key missing."]}
 
-    settings = ctx.app_config.get('HYDRUS_SETTINGS', {})
-    api_address = settings.get('hydrus_api_url') or settings.get('api_address')
-    api_key = settings.get('hydrus_api_key') or settings.get('api_key')
+    api_address, api_key = ctx.api_address, ctx.api_key
     if not api_address: return {"success": False, "message": "API address not set for rating action.", "errors": ["API address not configured."]}
 
     logger.info(f"Rule '{ctx.rule_name}': Modifying rating for {file_hash} on '{rating_service_key}' to {rating_value}.")
@@ -11,7 +11,7 @@ arguments to every function.
 
 import sqlite3
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -29,8 +29,8 @@ class RuleExecutionContext:
                  run_id: str,
                  rule_execution_id: str,
                  is_manual_run: bool = False,
-                 override_bypass_list: Optional[List[str]] = None,
-                 deep_run_list: Optional[List[str]] = None):
+                 override_bypass_list: Optional[Iterable[str]] = None,
+                 deep_run_list: Optional[Iterable[str]] = None):
         """
         Initializes the context for a rule execution.
 
@@ -41,8 +41,8 @@ class RuleExecutionContext:
             run_id: The UUID of the parent "Run All Rules" job.
             rule_execution_id: The UUID for this specific rule execution log entry.
             is_manual_run: Flag indicating if the rule is being run manually.
-            override_bypass_list: A list of rule IDs to bypass override logic for.
-            deep_run_list: A list of `force_in` rule IDs to run in "deep" mode.
+            override_bypass_list: Rule IDs to bypass override logic for (stored as a frozenset).
+            deep_run_list: `force_in` rule IDs to run in "deep" mode (stored as a frozenset).
         """
         if not all([app_config, db_conn, rule, run_id, rule_execution_id]):
             raise ValueError("All core context arguments must be provided and not be None.")
@@ -56,8 +56,9 @@ class RuleExecutionContext:
         self.run_id: str = run_id
         self.rule_execution_id: str = rule_execution_id
         self.is_manual_run: bool = is_manual_run
-        self.override_bypass_list: List[str] = override_bypass_list or []
-        self.deep_run_list: List[str] = deep_run_list or []
+        # Checked once per matched file, so kept as sets; frozenset() of a frozenset is free.
+        self.override_bypass_list: FrozenSet[str] = frozenset(override_bypass_list or ())
+        self.deep_run_list: FrozenSet[str] = frozenset(deep_run_list or ())
 
         # --- Derived Rule Properties (for convenience) ---
         self.rule_id: str = rule.get('id', 'unknown_id')
@@ -66,11 +67,22 @@ class RuleExecutionContext:
         self.action: Dict[str, Any] = rule.get('action', {})
         self.action_type: str = self.action.get('type', 'unknown')
 
+        # --- Hydrus API Settings (resolved once per execution) ---
+        settings = app_config.get('HYDRUS_SETTINGS', {})
+        self.api_address: Optional[str] = settings.get('hydrus_api_url') or settings.get('api_address')
+        self.api_key: Optional[str] = settings.get('hydrus_api_key') or settings.get('api_key')
+        # Number of files handed to one add_to/force_in action call.
+        self.action_batch_size: int = max(1, int(settings.get('action_batch_size', 256)))
+
         # --- Stateful Properties (populated during execution) ---
         
         # Holds the list of all available Hydrus services, fetched once per rule.
         self.available_services: Optional[List[Dict[str, Any]]] = None
 
+        # `files` state rows for this execution's candidate hashes (None when untracked),
+        # batch-loaded by the overrides module.
+        self.file_states: Dict[str, Optional[sqlite3.Row]] = {}
+
     def __repr__(self) -> str:
         """Provides a developer-friendly representation of the context."""
         return (f"<RuleExecutionContext(rule_name='{self.rule_name}', "
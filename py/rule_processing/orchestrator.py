@@ -17,12 +17,15 @@ import uuid
 import traceback
 import sqlite3
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Tuple, List, Optional
+from typing import Iterable, Tuple, List, Optional
+from urllib.parse import urlencode
 
 
 from hydrus_interface import call_hydrus_api
-from database import get_db_connection, start_run_log, update_run_log_summary, log_file_event
+from database import acquire_connection, release_connection, start_run_log, update_run_log_summary, log_file_event
 
 # --- Relative imports from our new package structure ---
 from .context import RuleExecutionContext
@@ -33,6 +36,65 @@ from . import utils
 
 logger = logging.getLogger(__name__)
 
+# Boolean query-string values for the Hydrus search API.
+_JSON_TRUE = json.dumps(True)
+_JSON_FALSE = json.dumps(False)
+
+
+def _build_search_queries(hydrus_predicates: list, translation_warnings: Optional[list] = None) -> Tuple[list, List[Tuple[str, str]]]:
+    """
+    Serializes the (possibly split) search for a rule into ready-to-send query strings
+    for /get_files/search_files, so no encoding work happens inside the search loop.
+
+    The predicates shared by every sequential search are JSON-encoded once; each
+    query only appends its own split predicate to that encoding. A note describing
+    any split is added to `translation_warnings`.
+
+    Returns:
+        A tuple of (base_predicates, [(query_predicate_label, encoded_query_string), ...]).
+    """
+    base_predicates, split_predicates = translator.prepare_sequential_searches_lazy(hydrus_predicates, warnings_list=translation_warnings)
+    base_json = json.dumps(base_predicates)
+    if not split_predicates:
+        return base_predicates, [(str(base_predicates), urlencode({'tags': base_json, 'return_hashes': _JSON_TRUE, 'return_file_ids': _JSON_FALSE}))]
+
+    # json.dumps(base + [p]) == base_json without its closing bracket, the separator, dumps(p), "]"
+    base_json_open = base_json[:-1] + (", " if base_predicates else "")
+    return base_predicates, [
+        (f"<shared> + {split_pred}", urlencode({'tags': f"{base_json_open}{json.dumps(split_pred)}]", 'return_hashes': _JSON_TRUE, 'return_file_ids': _JSON_FALSE}))
+        for split_pred in split_predicates
+    ]
+
+
+@contextmanager
+def _pipelined_action_chunks(ctx: RuleExecutionContext, file_hashes: List[str], run_chunk):
+    """
+    Runs `run_chunk` over `file_hashes` in slices of `ctx.action_batch_size`.
+
+    Yields an iterator of (chunk, result) pairs in submission order. The Hydrus calls
+    for later chunks run on a single worker thread while the caller records the
+    results of earlier ones, so the DB connection is only ever used by the caller.
+    Chunks not yet started are cancelled if the caller stops early.
+    """
+    batch_size = ctx.action_batch_size
+    chunks = [file_hashes[i:i + batch_size] for i in range(0, len(file_hashes), batch_size)]
+    if len(chunks) <= 1:
+        yield ((chunk, run_chunk(chunk)) for chunk in chunks)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"rule-action-{ctx.rule_execution_id[:8]}")
+    try:
+        futures = [executor.submit(run_chunk, chunk) for chunk in chunks]
+        yield ((chunk, future.result()) for chunk, future in zip(chunks, futures))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _force_in_chunk(ctx: RuleExecutionContext, file_hashes: List[str], dest_keys: List[str]) -> Tuple[list, dict]:
+    """Fetches metadata for one chunk of files and runs 'force_in' on it. Returns (metadata_errors, result)."""
+    meta_list, meta_errs = actions.fetch_metadata(ctx, file_hashes)
+    return meta_errs, actions.force_in_services(ctx, meta_list, dest_keys)
+
 def estimate_rule_impact(app_config, rule, is_deep_run=False, is_bypass_override=False) -> Tuple[bool, dict]:
     """
     Estimates the impact of a rule without executing actions or writing to the permanent log.
@@ -54,7 +116,7 @@ def estimate_rule_impact(app_config, rule, is_deep_run=False, is_bypass_override
     hydrus_predicates = []
     translation_warnings = []
     try:
-        db_conn = get_db_connection()
+        db_conn = acquire_connection()
         # Create a minimal, temporary context for the estimation process.
         ctx = RuleExecutionContext(
             app_config=app_config,
@@ -79,17 +141,13 @@ def estimate_rule_impact(app_config, rule, is_deep_run=False, is_bypass_override
             raise Exception(f"Rule has critical translation warnings, cannot estimate: {', '.join(crit_warns)}")
 
         settings = app_config.get('HYDRUS_SETTINGS', {})
-        api_address = settings.get('hydrus_api_url') or settings.get('api_address')
-        api_key = settings.get('hydrus_api_key') or settings.get('api_key')
+        api_address, api_key = ctx.api_address, ctx.api_key
 
-        list_of_predicate_sets = translator.prepare_sequential_searches_if_needed(hydrus_predicates)
+        _, search_queries = _build_search_queries(hydrus_predicates, translation_warnings)
         all_matched_hashes = set()
 
-        for current_search_predicates in list_of_predicate_sets:
-            search_api_params = {
-                'tags': json.dumps(current_search_predicates), 'return_hashes': json.dumps(True), 'return_file_ids': json.dumps(False)
-            }
-            search_result, _ = call_hydrus_api(api_address, api_key, '/get_files/search_files', params=search_api_params)
+        for _, search_query in search_queries:
+            search_result, _ = call_hydrus_api(api_address, api_key, '/get_files/search_files', params=search_query)
             if not search_result.get("success"):
                 raise Exception(f"Hydrus file search failed during estimation: {search_result.get('message', 'API Error')}")
             all_matched_hashes.update(search_result.get('data', {}).get('hashes', []))
@@ -103,7 +161,7 @@ def estimate_rule_impact(app_config, rule, is_deep_run=False, is_bypass_override
         if last_viewed_threshold_seconds > 0 and eligible_hashes:
             threshold_dt = datetime.now() - timedelta(seconds=last_viewed_threshold_seconds)
             recent_predicates = [f"system:last viewed time > {threshold_dt.strftime('%Y-%m-%d %H:%M:%S')}"]
-            search_params = {'tags': json.dumps(recent_predicates), 'return_hashes': json.dumps(True)}
+            search_params = {'tags': json.dumps(recent_predicates), 'return_hashes': _JSON_TRUE}
             recent_res, _ = call_hydrus_api(api_address, api_key, '/get_files/search_files', params=search_params)
             recently_viewed_hashes_set = set(recent_res.get('data', {}).get('hashes', [])) if recent_res.get("success") else set()
 
@@ -114,6 +172,7 @@ def estimate_rule_impact(app_config, rule, is_deep_run=False, is_bypass_override
         # --- Override Filter ---
         skipped_override = 0
         final_candidate_hashes = []
+        overrides.load_file_states(ctx, eligible_hashes)
         for file_hash in list(eligible_hashes):
             status, _ = overrides.check_override(ctx, file_hash)
             if status == 'skipped':
@@ -138,10 +197,10 @@ def estimate_rule_impact(app_config, rule, is_deep_run=False, is_bypass_override
         }
     finally:
         if db_conn:
-            db_conn.close()
+            release_connection(db_conn)
 
 
-def execute_single_rule(app_config, db_conn, rule, current_run_id, execution_order_in_run, is_manual_run: bool = True, override_bypass_list: Optional[List[str]] = None, deep_run_list: Optional[List[str]] = None):
+def execute_single_rule(app_config, db_conn, rule, current_run_id, execution_order_in_run, is_manual_run: bool = True, override_bypass_list: Optional[Iterable[str]] = None, deep_run_list: Optional[Iterable[str]] = None):
     """
     Main function to execute a single rule's logic from start to finish.
     """
@@ -200,24 +259,20 @@ def execute_single_rule(app_config, db_conn, rule, current_run_id, execution_ord
 
         # --- 3 SEARCH ---
         settings = app_config.get('HYDRUS_SETTINGS', {})
-        api_address = settings.get('hydrus_api_url') or settings.get('api_address')
-        api_key = settings.get('hydrus_api_key') or settings.get('api_key')
+        api_address, api_key = ctx.api_address, ctx.api_key
 
-        list_of_predicate_sets = translator.prepare_sequential_searches_if_needed(hydrus_predicates)
+        shared_search_predicates, search_queries = _build_search_queries(hydrus_predicates, translation_warnings)
         all_matched_hashes = set()
 
-        logger.info(f"{log_prefix}: Searching Hydrus with {len(list_of_predicate_sets)} predicate set(s).")
-        for i, current_search_predicates in enumerate(list_of_predicate_sets):
-            logger.info(f"{log_prefix}: Search {i+1}/{len(list_of_predicate_sets)}: {str(current_search_predicates)}")
-            search_api_params = {
-                'tags': json.dumps(current_search_predicates),
-                'return_hashes': json.dumps(True),
-                'return_file_ids': json.dumps(False)
-            }
-            search_result, _ = call_hydrus_api(api_address, api_key, '/get_files/search_files', params=search_api_params)
+        logger.info(f"{log_prefix}: Searching Hydrus with {len(search_queries)} predicate set(s).")
+        if len(search_queries) > 1:
+            logger.info(f"{log_prefix}: Shared predicates for sequential searches: {str(shared_search_predicates)}")
+        for i, (current_search_predicates, search_query) in enumerate(search_queries):
+            logger.info(f"{log_prefix}: Search {i+1}/{len(search_queries)}: {str(current_search_predicates)}")
+            search_result, _ = call_hydrus_api(api_address, api_key, '/get_files/search_files', params=search_query)
 
             if not search_result.get("success"):
-                if len(list_of_predicate_sets) > 1:
+                if len(search_queries) > 1:
                     logger.warning(f"{log_prefix}: Sequential search {i+1} failed and was skipped: {search_result.get('message', 'API Error')}")
                     continue
                 else:
@@ -235,7 +290,7 @@ def execute_single_rule(app_config, db_conn, rule, current_run_id, execution_ord
         if last_viewed_threshold_seconds > 0:
             threshold_dt = datetime.now() - timedelta(seconds=last_viewed_threshold_seconds)
             recent_predicates = [f"system:last viewed time > {threshold_dt.strftime('%Y-%m-%d %H:%M:%S')}"]
-            search_params = {'tags': json.dumps(recent_predicates), 'return_hashes': json.dumps(True)}
+            search_params = {'tags': json.dumps(recent_predicates), 'return_hashes': _JSON_TRUE}
             recent_res, _ = call_hydrus_api(api_address, api_key, '/get_files/search_files', params=search_params)
             recently_viewed_hashes_set = set(recent_res.get('data', {}).get('hashes', [])) if recent_res.get("success") else set()
 
@@ -248,6 +303,7 @@ def execute_single_rule(app_config, db_conn, rule, current_run_id, execution_ord
         else:
             eligible_hashes_after_view_filter = matched_hashes_raw
 
+        overrides.load_file_states(ctx, eligible_hashes_after_view_filter)
         for file_hash in eligible_hashes_after_view_filter:
             status, reason = overrides.check_override(ctx, file_hash)
             if status == 'skipped':
@@ -267,41 +323,50 @@ def execute_single_rule(app_config, db_conn, rule, current_run_id, execution_ord
             action_data = ctx.action
             action_type = ctx.action_type
             logger.info(f"{log_prefix}: Attempting '{action_type}' for {len(files_to_attempt_action_on)} files.")
+            # All files touched by this execution share one 'last_updated' stamp.
+            state_updated_at = datetime.utcnow().isoformat() + "Z"
 
             if action_type == 'add_to':
                 dest_keys = action_data.get('destination_service_keys', [])
-                result = actions.add_to_services(ctx, files_to_attempt_action_on, dest_keys)
-                succeeded_hashes = list(set(files_to_attempt_action_on) - set(result.get('files_with_some_errors', {}).keys()))
-                succeeded_count_total = len(succeeded_hashes)
-                failed_count_total = len(result.get('files_with_some_errors', {}))
-                if failed_count_total > 0: overall_rule_success_flag = False
-
-                final_details["action_processing_results"].append({**result, "action_type": action_type})
-
-                for h in succeeded_hashes:
-                    log_file_event(db_conn, ctx.rule_execution_id, h, "success", {"action": action_type, "destinations": dest_keys})
-                    overrides.update_state_after_success(ctx, h)
-                for h, errs in result.get('files_with_some_errors', {}).items():
-                    log_file_event(db_conn, ctx.rule_execution_id, h, "failure", {"action": action_type, "errors": errs}, str(errs))
+                with _pipelined_action_chunks(
+                    ctx, files_to_attempt_action_on, lambda chunk: actions.add_to_services(ctx, chunk, dest_keys)
+                ) as chunk_results:
+                    for chunk, result in chunk_results:
+                        errored_hashes = result.get('files_with_some_errors', {})
+                        succeeded_hashes = [h for h in chunk if h not in errored_hashes]
+                        succeeded_count_total += len(succeeded_hashes)
+                        failed_count_total += len(errored_hashes)
+                        if errored_hashes: overall_rule_success_flag = False
+
+                        final_details["action_processing_results"].append({**result, "action_type": action_type})
+
+                        for h in succeeded_hashes:
+                            log_file_event(db_conn, ctx.rule_execution_id, h, "success", {"action": action_type, "destinations": dest_keys})
+                            overrides.update_state_after_success(ctx, h, state_updated_at)
+                        for h, errs in errored_hashes.items():
+                            log_file_event(db_conn, ctx.rule_execution_id, h, "failure", {"action": action_type, "errors": errs}, str(errs))
 
             elif action_type == 'force_in':
                 dest_keys = action_data.get('destination_service_keys', [])
-                meta_list, meta_errs = actions.fetch_metadata(ctx, files_to_attempt_action_on)
-                final_details["metadata_errors"].extend(meta_errs)
-
-                result = actions.force_in_services(ctx, meta_list, dest_keys)
-                succeeded_hashes = result.get("files_fully_successful", [])
-                succeeded_count_total = len(succeeded_hashes)
-                failed_count_total = len(result.get("files_with_errors", {}))
-                if failed_count_total > 0: overall_rule_success_flag = False
-
-                final_details["action_processing_results"].append({**result, "action_type": action_type})
-
-                for h in succeeded_hashes:
-                    log_file_event(db_conn, ctx.rule_execution_id, h, "success", {"action": action_type, "destinations": dest_keys})
-                    overrides.update_state_after_success(ctx, h)
-                for h, err_detail in result.get("files_with_errors", {}).items():
-                    log_file_event(db_conn, ctx.rule_execution_id, h, "failure", {"action": action_type, "failure_details": err_detail}, str(err_detail))
+                with _pipelined_action_chunks(
+                    ctx, files_to_attempt_action_on, lambda chunk: _force_in_chunk(ctx, chunk, dest_keys)
+                ) as chunk_results:
+                    for _, (meta_errs, result) in chunk_results:
+                        final_details["metadata_errors"].extend(meta_errs)
+
+                        succeeded_hashes = result.get("files_fully_successful", [])
+                        errored_files = result.get("files_with_errors", {})
+                        succeeded_count_total += len(succeeded_hashes)
+                        failed_count_total += len(errored_files)
+                        if errored_files: overall_rule_success_flag = False
+
+                        final_details["action_processing_results"].append({**result, "action_type": action_type})
+
+                        for h in succeeded_hashes:
+                            log_file_event(db_conn, ctx.rule_execution_id, h, "success", {"action": action_type, "destinations": dest_keys})
+                            overrides.update_state_after_success(ctx, h, state_updated_at)
+                        for h, err_detail in errored_files.items():
+                            log_file_event(db_conn, ctx.rule_execution_id, h, "failure", {"action": action_type, "failure_details": err_detail}, str(err_detail))
 
             elif action_type in ['add_tags', 'remove_tags']:
                 mode = 0 if action_type == 'add_tags' else 1
@@ -325,7 +390,7 @@ def execute_single_rule(app_config, db_conn, rule, current_run_id, execution_ord
                     if result.get("success"):
                         succeeded_hashes.append(h)
                         log_file_event(db_conn, ctx.rule_execution_id, h, "success", {"action": action_type, **action_data})
-                        overrides.update_state_after_success(ctx, h)
+                        overrides.update_state_after_success(ctx, h, state_updated_at)
                     else:
                         overall_rule_success_flag = False
                         failed_count_total += 1
@@ -12,13 +12,48 @@ has been successfully performed.
 import json
 import logging
 from datetime import datetime
-from typing import Tuple, Dict, Any, Optional
+from typing import Tuple, Dict, Any, Iterable, Optional
 
+from database import SQL_IN_CHUNK_SIZE
 from .context import RuleExecutionContext
 
 logger = logging.getLogger(__name__)
 
 
+def load_file_states(ctx: RuleExecutionContext, file_hashes: Iterable[str]) -> None:
+    """
+    Batch-loads the `files` state rows for a rule execution's candidate hashes.
+
+    Rows are fetched with chunked IN queries and cached on the context for
+    check_override; hashes with no row are cached as None. Only the given
+    candidates are loaded, so the cost follows the size of the match rather
+    than the size of the state table.
+    """
+    if ctx.action_type not in ['add_to', 'force_in', 'modify_rating']:
+        return
+
+    pending = [h for h in dict.fromkeys(file_hashes) if h not in ctx.file_states]
+    if not pending:
+        return
+
+    ctx.file_states.update(dict.fromkeys(pending))
+    cursor = ctx.db_conn.cursor()
+    for start in range(0, len(pending), SQL_IN_CHUNK_SIZE):
+        chunk = pending[start:start + SQL_IN_CHUNK_SIZE]
+        placeholders = ','.join('?' for _ in chunk)
+        cursor.execute(f"SELECT * FROM files WHERE file_hash IN ({placeholders})", chunk)
+        ctx.file_states.update((row['file_hash'], row) for row in cursor.fetchall())
+
+
+def _get_file_state_row(ctx: RuleExecutionContext, file_hash: str):
+    """Returns the `files` row for a hash, from the preloaded states when available."""
+    if file_hash in ctx.file_states:
+        return ctx.file_states[file_hash]
+    cursor = ctx.db_conn.cursor()
+    cursor.execute("SELECT * FROM files WHERE file_hash = ?", (file_hash,))
+    return cursor.fetchone()
+
+
 def check_override(ctx: RuleExecutionContext, file_hash: str) -> Tuple[str, Optional[str]]:
     """
     Checks if the current rule should be skipped for a file due to override logic.
@@ -43,9 +78,7 @@ def check_override(ctx: RuleExecutionContext, file_hash: str) -> Tuple[str, Opti
     if ctx.action_type not in ['add_to', 'force_in', 'modify_rating']:
         return ('run', 'Action type does not use the override system.')
 
-    cursor = ctx.db_conn.cursor()
-    cursor.execute("SELECT * FROM files WHERE file_hash = ?", (file_hash,))
-    file_state_row = cursor.fetchone()
+    file_state_row = _get_file_state_row(ctx, file_hash)
 
     # If file is not in the state table, no overrides apply yet.
     if not file_state_row:
@@ -98,7 +131,7 @@ def check_override(ctx: RuleExecutionContext, file_hash: str) -> Tuple[str, Opti
         return ('skipped', skip_reason)
 
 
-def update_state_after_success(ctx: RuleExecutionContext, file_hash: str):
+def update_state_after_success(ctx: RuleExecutionContext, file_hash: str, now_iso: Optional[str] = None):
     """
     Updates the `files` table for a file after a managed action was successful.
 
@@ -108,11 +141,15 @@ def update_state_after_success(ctx: RuleExecutionContext, file_hash: str):
     Args:
         ctx: The RuleExecutionContext for the rule that just ran.
         file_hash: The hash of the file whose state needs updating.
+        now_iso: The 'last_updated' timestamp to store. Callers updating many files
+            for one execution should compute it once and pass it in.
     """
     if ctx.action_type not in ['add_to', 'force_in', 'modify_rating']:
         # Do not update state for manual runs or unmanaged actions
         return
 
+    # Re-read the row rather than using the preloaded one: another run may have
+    # updated it while this execution's actions were in flight.
     cursor = ctx.db_conn.cursor()
     cursor.execute("SELECT * FROM files WHERE file_hash = ?", (file_hash,))
     file_state_row = cursor.fetchone()
@@ -122,13 +159,13 @@ def update_state_after_success(ctx: RuleExecutionContext, file_hash: str):
     if file_state_row:
         try:
             state = {
-                'rules_in_application': json.loads(file_state_row['rules_in_application']),
+                'rules_in_application': set(json.loads(file_state_row['rules_in_application'])),
                 'force_in_priority_governance': file_state_row['force_in_priority_governance'],
-                'correct_placement': json.loads(file_state_row['correct_placement']),
-                'affected_rating_services': json.loads(file_state_row['affected_rating_services']),
+                'correct_placement': set(json.loads(file_state_row['correct_placement'])),
+                'affected_rating_services': set(json.loads(file_state_row['affected_rating_services'])),
                 'rating_priority_governance': json.loads(file_state_row['rating_priority_governance']),
             }
-        except (KeyError, json.JSONDecodeError):
+        except (KeyError, TypeError, json.JSONDecodeError):
             # If data is corrupt, start fresh
             state = _get_default_file_state()
     else:
@@ -136,32 +173,29 @@ def update_state_after_success(ctx: RuleExecutionContext, file_hash: str):
 
     # --- 2. Mutate State based on the successful action ---
     # Ensure current rule ID is tracked
-    if ctx.rule_id not in state['rules_in_application']:
-        state['rules_in_application'].append(ctx.rule_id)
+    state['rules_in_application'].add(ctx.rule_id)
 
     # Apply state changes based on action type
     if ctx.action_type == 'modify_rating':
         rating_service_key = ctx.action.get('rating_service_key')
         if rating_service_key:
-            if rating_service_key not in state['affected_rating_services']:
-                state['affected_rating_services'].append(rating_service_key)
+            state['affected_rating_services'].add(rating_service_key)
             state['rating_priority_governance'][rating_service_key] = ctx.rule_importance
 
     elif ctx.action_type == 'add_to':
         # We only care about the *first* destination key for placement logic, as per design.
         # But a rule can have multiple destinations, so we iterate.
         dest_keys = ctx.action.get('destination_service_keys', [])
-        for key in dest_keys:
-            if key and key not in state['correct_placement']:
-                state['correct_placement'].append(key)
+        state['correct_placement'].update(key for key in dest_keys if key)
 
     elif ctx.action_type == 'force_in':
         # 'force_in' is decisive: it overwrites previous placements and sets the governance priority.
         dest_keys = ctx.action.get('destination_service_keys', [])
-        state['correct_placement'] = [key for key in dest_keys if key] # Set placement to only this rule's destinations
+        state['correct_placement'] = {key for key in dest_keys if key} # Set placement to only this rule's destinations
         state['force_in_priority_governance'] = ctx.rule_importance
 
     # --- 3. Write Updated State to DB ---
+    # Set-valued fields are stored as sorted lists so the JSON is stable.
     cursor.execute('''
         INSERT OR REPLACE INTO files (
             file_hash, rules_in_application, force_in_priority_governance,
@@ -169,21 +203,23 @@ def update_state_after_success(ctx: RuleExecutionContext, file_hash: str):
         ) VALUES (?, ?, ?, ?, ?, ?, ?)
     ''', (
         file_hash,
-        json.dumps(state['rules_in_application']),
+        json.dumps(sorted(state['rules_in_application'])),
         state['force_in_priority_governance'],
-        json.dumps(state['correct_placement']),
-        json.dumps(state['affected_rating_services']),
+        json.dumps(sorted(state['correct_placement'])),
+        json.dumps(sorted(state['affected_rating_services'])),
         json.dumps(state['rating_priority_governance']),
-        datetime.utcnow().isoformat() + "Z"
+        now_iso or (datetime.utcnow().isoformat() + "Z")
     ))
+    # The preloaded row is now stale; later reads go back to the database.
+    ctx.file_states.pop(file_hash, None)
 
 
 def _get_default_file_state() -> Dict[str, Any]:
     """Returns a dictionary representing the default state for a new file."""
     return {
-        'rules_in_application': [],
+        'rules_in_application': set(),
         'force_in_priority_governance': -1, # Start at -1 so priority 0 rules can win
-        'correct_placement': [],
-        'affected_rating_services': [],
+        'correct_placement': set(),
+        'affected_rating_services': set(),
         'rating_priority_governance': {},
     }
\ No newline at end of file
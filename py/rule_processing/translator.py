@@ -8,97 +8,710 @@ Hydrus client API expects for file searches. It also generates warnings for any
 misconfigurations or ambiguities found during the translation process.
 """
 
+import os
+import re
 import logging
-from typing import List, Tuple, Dict, Any, Union
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List, Tuple, Dict, Any, Optional, Union
 
 # Since this module will be part of a package, we use a relative import
 from .context import RuleExecutionContext
 
 logger = logging.getLogger(__name__)
 
-
+# Phrases that make a (non-note) warning critical. They are compiled into a single
+# alternation so a message is classified in one scan rather than one search per phrase.
+_CRITICAL_PHRASES = (
+    "skipping condition", "unhandled condition", "invalid value", "malformed 'file_service' condition",
+    "not found for condition", "missing", "error translating", "unsupported operator for", "unknown specific url type",
+    "target all files" # Added for empty predicate checks
+)
+_CRITICAL_PHRASES_RE = re.compile("|".join(re.escape(phrase) for phrase in _CRITICAL_PHRASES))
+_CRITICAL_PREFIXES = ("critical warning:", "critical:")
+
+# One stripped, non-empty, non-comment line of a paste_search block per match. Lines are
+# split on '\n' only and stripped of any other whitespace, as str.split/str.strip did.
+_PASTE_LINE_RE = re.compile(r'(?m)^[^\S\n]*([^#\s][^\n]*?)[^\S\n]*$')
+
+# Predicate prefixes that select files by file service; used to split large OR-groups.
+_CORRECT_IS_IN_PREFIX = "system:file service currently in "
+_CORRECT_IS_NOT_IN_PREFIX = "system:file service is not currently in "
+_FS_PREFIXES = (_CORRECT_IS_IN_PREFIX, _CORRECT_IS_NOT_IN_PREFIX)
+# Shorthand accepted in paste_search and rewritten to the prefixes above.
+_MALFORMED_IS_IN_PREFIX = "system:is currently in "
+_MALFORMED_IS_NOT_IN_PREFIX = "system:is not currently in "
+_MALFORMED_PREFIX_STEM = "system:is " # Common to both malformed prefixes
+
+class _OrGroup(list):
+    """
+    Marks a predicate list as a Hydrus OR-group. It is still a plain list to JSON and
+    to callers; the splitter uses `type(x) is _OrGroup` to find OR-groups.
+    """
+    __slots__ = ()
+
+
+# --- Message templates for warnings emitted once per item in a loop ---
+_PASTE_CORRECTION_NOTE = "Note (PasteSearch, Line {line}): Auto-corrected predicate '{original}' to '{corrected}'."
+_ADD_TO_KEY_NOT_FOUND_WARNING = "Warning: Action 'add_to': service key '{key}' not found for exclusion. Skipping exclusion."
+_FORCE_IN_KEY_NOT_FOUND_WARNING = "Warning: Action 'force_in': destination service key '{key}' not found. Cannot add exclusion predicate for it."
+
+# --- Condition translation tables (read-only, shared by every translation) ---
+_FILESIZE_OP_MAP = MappingProxyType({'=': '~=', '>': '>', '<': '<', '!=': '≠'})
+_FILESIZE_UNIT_MAP = MappingProxyType({'bytes': 'B', 'KB': 'kilobytes', 'MB': 'megabytes', 'GB': 'GB'})
+_FILESIZE_OP_NOTES = MappingProxyType({'!=': "Note: Filesize '!=' translated to Hydrus '≠'."})
+# (operator, unit) -> (predicate template taking the size, note or None)
+_FILESIZE_RULES = MappingProxyType({
+    (op, unit): (f"system:filesize {hydrus_op} {{}} {hydrus_unit}", _FILESIZE_OP_NOTES.get(op))
+    for op, hydrus_op in _FILESIZE_OP_MAP.items()
+    for unit, hydrus_unit in _FILESIZE_UNIT_MAP.items()
+})
+
+_BOOLEAN_POSITIVE_FORMS = MappingProxyType({
+    'inbox': 'system:inbox', 'archive': 'system:archive',
+    'local': 'system:file service currently in all local files',
+    'trashed': 'system:file service currently in trash',
+    'deleted': 'system:is deleted',
+    'has_duration': 'system:has duration',
+    'is_the_best_quality_file_of_its_duplicate_group': 'system:is the best quality file of its duplicate group',
+    'has_audio': 'system:has audio', 'has_exif': 'system:has exif',
+    'has_embedded_metadata': 'system:has embedded metadata',
+    'has_icc_profile': 'system:has icc profile',
+    'has_tags': 'system:has tags',
+    'has_notes': 'system:has notes',
+    'has_transparency': 'system:has transparency',
+})
+_BOOLEAN_NEGATIVE_FORMS = MappingProxyType({
+    'local': 'system:file service is not currently in all local files',
+    'trashed': 'system:file service is not currently in trash',
+    'has_duration': 'system:no duration',
+    'is_the_best_quality_file_of_its_duplicate_group': 'system:is not the best quality file of its duplicate group',
+    'has_audio': 'system:no audio', 'has_exif': 'system:no exif',
+    'has_embedded_metadata': 'system:no embedded metadata',
+    'has_icc_profile': 'system:no icc profile',
+    'has_tags': 'system:no tags', # Hydrus synonym for 'system:untagged'
+    'has_notes': 'system:does not have notes', # Hydrus synonym for 'system:no notes'
+    'has_transparency': 'system:no transparency',
+})
+_BOOLEAN_NEGATIVE_NOTES = MappingProxyType({
+    'has_tags': "Note: 'has_tags is false' mapped to 'system:no tags'. 'system:untagged' is an equivalent option.",
+    'has_notes': "Note: 'has_notes is false' mapped to 'system:no notes'.",
+})
+# (operator, value) -> (predicate, note or None), so a boolean condition is a single lookup.
+_BOOL_FORMS = MappingProxyType({
+    **{(op, True): (pred, None) for op, pred in _BOOLEAN_POSITIVE_FORMS.items()},
+    **{(op, False): (pred, _BOOLEAN_NEGATIVE_NOTES.get(op)) for op, pred in _BOOLEAN_NEGATIVE_FORMS.items()},
+})
+
+
+@lru_cache(maxsize=4096)
 def is_critical_warning(warning_message: str) -> bool:
-    """Determines if a translation warning is critical, meaning it would make a rule unsafe to run."""
+    """
+    Determines if a translation warning is critical, meaning it would make a rule unsafe to run.
+
+    Cached, since the same rules (and so the same messages) are translated on every scheduled run.
+    """
     msg_lower = warning_message.lower()
     if "note:" in msg_lower and not "critical note:" in msg_lower: # Allow "Critical Note:"
         return False
     # Check for explicit "CRITICAL Warning:" or "CRITICAL:" prefix first
-    if msg_lower.startswith("critical warning:") or msg_lower.startswith("critical:"):
+    if msg_lower.startswith(_CRITICAL_PREFIXES):
         return True
-    critical_phrases = [
-        "skipping condition", "unhandled condition", "invalid value", "malformed 'file_service' condition",
-        "not found for condition", "missing", "error translating", "unsupported operator for", "unknown specific url type",
-        "target all files" # Added for empty predicate checks
-    ]
-    return any(phrase in msg_lower for phrase in critical_phrases)
+    return _CRITICAL_PHRASES_RE.search(msg_lower) is not None
+
+
+def _emit(warnings_list: list, message: str, _is_critical=is_critical_warning) -> None:
+    """Classifies a translation warning and appends it to `warnings_list` as a {'level', 'message'} dict."""
+    warnings_list.append({'level': 'critical' if _is_critical(message) else 'info', 'message': message})
 
 
-def prepare_sequential_searches_if_needed(hydrus_predicates: list, min_to_split: int = 3) -> List[list]:
+def prepare_sequential_searches_if_needed(hydrus_predicates: list, min_to_split: int = 3, warnings_list: Optional[list] = None) -> List[list]:
     """
     Identifies an OR-group with many file service conditions and prepares it for sequential searching.
 
     If an OR-group contains `min_to_split` or more file service predicates, this
     function will deconstruct the query. It creates a separate, complete search query
-    for each of those file service predicates, combining it with all other static and
-    common conditions. This turns one large, inefficient OR search into multiple
-    smaller, efficient AND searches.
+    for each of those file service predicates, combining it with all other static
+    conditions, plus one query for the group's other alternatives (if any). The union
+    of the results is what the original OR search would have matched. This turns one
+    large, inefficient OR search into multiple smaller, efficient AND searches.
 
     Args:
         hydrus_predicates (list): The list of predicates from the translator.
         min_to_split (int): The minimum number of file service predicates required to trigger sequential searches.
+        warnings_list (list, optional): If given, an info note describing the split is appended to it.
 
     Returns:
         list: A list of predicate sets. If splitting occurs, it will contain multiple
               predicate sets, each for a separate API call. If not, it will contain
               a single list with the original predicates.
     """
-    def is_file_service_predicate(p):
-        return isinstance(p, str) and (
-            p.startswith("system:file service currently in ") or
-            p.startswith("system:file service is not currently in ")
-        )
+    base_predicates, split_predicates = prepare_sequential_searches_lazy(hydrus_predicates, min_to_split, warnings_list)
+    if not split_predicates:
+        return [base_predicates]
+    # Each new search is the base query PLUS one of the split predicates
+    return [base_predicates + [split_pred] for split_pred in split_predicates]
 
-    candidate_group_info = None
 
-    # 1. Find a single, valid candidate OR-group for sequential processing
-    for i, pred_group in enumerate(hydrus_predicates):
-        if isinstance(pred_group, list):
-            file_service_pred_count = sum(1 for p in pred_group if is_file_service_predicate(p))
+def prepare_sequential_searches_lazy(hydrus_predicates: list, min_to_split: int = 3, warnings_list: Optional[list] = None) -> Tuple[list, list]:
+    """
+    Like `prepare_sequential_searches_if_needed`, but without building a full copy of
+    the shared predicates for every sequential search.
 
-            if file_service_pred_count >= min_to_split:
-                if candidate_group_info is not None:
-                    # Found a second splittable group, which is too complex. Abort.
-                    return [hydrus_predicates] # Return original predicates wrapped in a list
-                candidate_group_info = {'group': pred_group, 'index': i}
+    When several OR-groups qualify, the one with the most file service predicates is
+    split (the first, on a tie); the others stay in every search unchanged, which
+    keeps the AND of the groups intact.
 
-    if candidate_group_info is None:
-        # No group found that meets the criteria. Return the original single query.
-        return [hydrus_predicates]
+    Returns:
+        A tuple of (base_predicates, split_predicates). When splitting occurs, search
+        N is `base_predicates + [split_predicates[N]]`; each split predicate is a file
+        service predicate, except for a final entry holding the group's remaining
+        alternatives (a string, or an OR-group list if there are several). When it
+        does not, `split_predicates` is empty and `base_predicates` is the original list.
+    """
+    splittable_group = None
+    splittable_group_index = -1
+    splittable_fs_count = 0
+
+    # 1. Find the OR-group with the most file service predicates
+    for i, pred_group in enumerate(hydrus_predicates):
+        if type(pred_group) is _OrGroup:
+            # Inlined file-service check: the tuple form of startswith() tests both prefixes in one call.
+            file_service_pred_count = sum(1 for p in pred_group if isinstance(p, str) and p.startswith(_FS_PREFIXES))
+            if file_service_pred_count >= min_to_split and file_service_pred_count > splittable_fs_count:
+                splittable_group, splittable_group_index, splittable_fs_count = pred_group, i, file_service_pred_count
 
-    splittable_group = candidate_group_info['group']
-    splittable_group_index = candidate_group_info['index']
+    if splittable_group is None:
+        # No group found that meets the criteria. Return the original single query.
+        return hydrus_predicates, []
 
-    # 2. Separate all predicates
-    static_preds_outside_or_group = [p for i, p in enumerate(hydrus_predicates) if i != splittable_group_index]
-    
-    common_preds_in_or_group = []
-    file_service_preds_for_sequencing = []
+    # 2. Separate the candidate group's predicates
+    other_alternatives_in_or_group = []
+    split_predicates = []
     for p in splittable_group:
-        if is_file_service_predicate(p):
-            file_service_preds_for_sequencing.append(p)
+        if isinstance(p, str) and p.startswith(_FS_PREFIXES):
+            split_predicates.append(p)
+        else:
+            other_alternatives_in_or_group.append(p)
+
+    # 3. The group's non-file-service alternatives are still OR'ed in, as one more search
+    if len(other_alternatives_in_or_group) == 1:
+        split_predicates.append(other_alternatives_in_or_group[0])
+    elif other_alternatives_in_or_group:
+        split_predicates.append(_OrGroup(other_alternatives_in_or_group))
+
+    if warnings_list is not None:
+        message = (f"Note: Split an OR group of {splittable_fs_count} file service predicates into {len(split_predicates)} sequential searches"
+                   f"{' (one covering its other alternatives)' if other_alternatives_in_or_group else ''}.")
+        _emit(warnings_list, message)
+
+    # 4. The shared part of every sequential search
+    return hydrus_predicates[:splittable_group_index] + hydrus_predicates[splittable_group_index + 1:], split_predicates
+
+
+# --- Cached predicate builders ---
+# Service names come from a small, stable set, so the same predicate strings are rebuilt
+# on every scheduled run. Caching returns the same string object each time.
+
+@lru_cache(maxsize=256)
+def _fs_in(service_name: str) -> str:
+    return f"system:file service currently in {service_name}"
+
+
+@lru_cache(maxsize=256)
+def _fs_not_in(service_name: str) -> str:
+    return f"system:file service is not currently in {service_name}"
+
+
+@lru_cache(maxsize=256)
+def _rating_base(service_name: str) -> str:
+    return f"system:rating for {service_name}"
+
+
+# --- Condition Handlers ---
+# Each handler translates one condition type and returns (predicate, warning_msg), where
+# predicate is a string, a list of strings (an OR group, or the tag list for 'tags'), or
+# None. Informational notes are appended to `warnings_list_ref` (the caller's per-condition
+# list) directly; `warning_msg` is prefixed with the condition summary by the caller.
+
+def _unhandled_condition_msg(condition_type) -> str:
+    return f"Warning: Unhandled condition type '{condition_type}'. Skipping."
+
+
+def _translate_tags_condition(condition, services_by_key, warnings_list_ref):
+    operator = condition.get('operator')
+    value = condition.get('value')
+    if operator == 'search_terms' and isinstance(value, list):
+        if value:
+            return value, None # Returns a list of tags, not a single predicate string
+        return None, f"Warning: Empty tags list in condition. Skipping condition."
+    return None, _unhandled_condition_msg('tags')
+
+
+def _translate_like_dislike_rating(service_name, predicate_base_for_rating, max_stars, operator, value, warnings_list_ref):
+    if operator == 'is':
+        if isinstance(value, bool):
+            keyword = 'like' if value is True else 'dislike'
+            return f"{predicate_base_for_rating} is {keyword}", None
+        return None, f"Warning: Unsupported value type '{type(value).__name__}' for 'is' on like/dislike rating '{service_name}'. Expected boolean. Skipping condition."
+    return None, f"Warning: Unsupported operator '{operator}' for like/dislike rating '{service_name}' (excluding 'no_rating', 'has_rating'). Skipping condition."
+
+
+# Comparison symbol per numerical rating operator; '!=' becomes an OR group of '<' and '>'.
+_NUMERICAL_RATING_OPERATORS = MappingProxyType({'is': '=', 'more_than': '>', 'less_than': '<', '!=': None})
+
+
+def _stars_suffix(max_stars) -> str:
+    """The '/max_stars' suffix for numerical rating predicates, or '' if the service has no max_stars."""
+    return f"/{max_stars}" if (max_stars is not None and max_stars > 0) else ""
+
+
+def _translate_numerical_rating(service_name, predicate_base_for_rating, max_stars, operator, value, warnings_list_ref):
+    if not isinstance(value, (int, float)):
+        return None, f"Warning: Invalid value '{value}' for numerical rating '{service_name}'. Expected number. Skipping condition."
+    numeric_value = int(value)
+    if not isinstance(operator, str) or operator not in _NUMERICAL_RATING_OPERATORS:
+        return None, f"Warning: Unsupported operator '{operator}' for numerical rating '{service_name}'. Skipping condition."
+    stars_suffix = _stars_suffix(max_stars)
+    if operator == '!=':
+        less_than_pred = f"{predicate_base_for_rating} < {numeric_value}{stars_suffix}"
+        more_than_pred = f"{predicate_base_for_rating} > {numeric_value}{stars_suffix}"
+        _emit(warnings_list_ref, f"Note: Numerical rating '!=' for '{service_name}' translated to OR group: [{less_than_pred}, {more_than_pred}].")
+        return [less_than_pred, more_than_pred], None
+    if operator == 'is' and not stars_suffix:
+        _emit(warnings_list_ref, f"Note: 'is {numeric_value}' for numerical rating '{service_name}' without max_stars. Standard numerical equality assumed.")
+    return f"{predicate_base_for_rating} {_NUMERICAL_RATING_OPERATORS[operator]} {numeric_value}{stars_suffix}", None
+
+
+def _translate_inc_dec_rating(service_name, predicate_base_for_rating, max_stars, operator, value, warnings_list_ref):
+    if not isinstance(value, (int, float)):
+        return None, f"Warning: Invalid value '{value}' for inc/dec rating '{service_name}'. Expected number. Skipping condition."
+    numeric_value = int(value)
+    if operator == 'is': return f"{predicate_base_for_rating} = {numeric_value}", None
+    elif operator == 'more_than': return f"{predicate_base_for_rating} > {numeric_value}", None
+    elif operator == 'less_than': return f"{predicate_base_for_rating} < {numeric_value}", None
+    elif operator == '!=':
+        less_than_pred = f"{predicate_base_for_rating} < {numeric_value}"
+        more_than_pred = f"{predicate_base_for_rating} > {numeric_value}"
+        _emit(warnings_list_ref, f"Note: Inc/dec rating '!=' for '{service_name}' translated to OR group: [{less_than_pred}, {more_than_pred}].")
+        return [less_than_pred, more_than_pred], None
+    return None, f"Warning: Unsupported operator '{operator}' for inc/dec rating '{service_name}'. Skipping condition."
+
+
+# Rating translation by Hydrus service type: 7 = like/dislike, 6 = numerical stars, 22 = inc/dec.
+_RATING_HANDLERS = MappingProxyType({
+    7: _translate_like_dislike_rating,
+    6: _translate_numerical_rating,
+    22: _translate_inc_dec_rating,
+})
+
+
+def _translate_rating_condition(condition, services_by_key, warnings_list_ref):
+    g = condition.get
+    condition_service_key, operator, value = g('service_key'), g('operator'), g('value')
+    if not (condition_service_key and operator):
+        return None, _unhandled_condition_msg('rating')
+
+    service_info = services_by_key.get(condition_service_key)
+    if not service_info:
+        return None, f"Warning: Rating service with key {condition_service_key} not found. Skipping condition."
+
+    service_name = service_info['name']
+    if operator == 'no_rating' and value is None:
+        return f"system:does not have a rating for {service_name}", None
+    if operator == 'has_rating' and value is None:
+        return f"system:has a rating for {service_name}", None
+
+    rating_handler = _RATING_HANDLERS.get(service_info.get('type'))
+    if not rating_handler:
+        return None, None
+    return rating_handler(service_name, _rating_base(service_name), service_info.get('max_stars'), operator, value, warnings_list_ref)
+
+
+def _translate_file_service_condition(condition, services_by_key, warnings_list_ref):
+    operator = condition.get('operator')
+    value = condition.get('value')
+    if value and operator in ['is_in', 'is_not_in']:
+        service_info = services_by_key.get(value)
+        if not service_info:
+            return None, f"Warning: File service key '{value}' (from 'value' field) not found for 'file_service' condition. Skipping condition."
+        service_name_for_predicate = service_info['name']
+        if operator == 'is_in':
+            return _fs_in(service_name_for_predicate), None
+        return _fs_not_in(service_name_for_predicate), None # is_not_in
+
+    details_for_log = []
+    if not value: details_for_log.append("missing service key (expected in 'value' field)")
+    if operator not in ['is_in', 'is_not_in']:
+        details_for_log.append(f"unexpected operator '{operator}' (expected 'is_in' or 'is_not_in')")
+    if details_for_log:
+        return None, f"Warning: Malformed 'file_service' condition ({', '.join(details_for_log)}). Skipping condition."
+    return None, f"Warning: Unhandled 'file_service' condition variant. Skipping condition."
+
+
+def _translate_filesize_condition(condition, services_by_key, warnings_list_ref):
+    g = condition.get
+    operator, value, unit = g('operator'), g('value'), g('unit')
+    if not (operator and value is not None and unit):
+        return None, _unhandled_condition_msg('filesize')
+
+    filesize_rule = _FILESIZE_RULES.get((operator, unit))
+    if not filesize_rule:
+        # An invalid unit is reported in preference to an invalid operator.
+        if unit not in _FILESIZE_UNIT_MAP:
+            return None, f"Warning: Invalid filesize unit '{unit}'. Skipping condition."
+        return None, f"Warning: Unsupported filesize operator '{operator}'. Using direct symbol. Skipping condition."
+    predicate_template, note = filesize_rule
+    try:
+        predicate_string = predicate_template.format(_format_filesize_value(value))
+        if note:
+            _emit(warnings_list_ref, note)
+        return predicate_string, None
+    except (ValueError, TypeError) as e:
+        return None, f"Warning: Invalid filesize value '{value}': {e}. Skipping condition."
+
+
+def _format_filesize_value(value) -> Union[int, float]:
+    """Normalizes a filesize value to an int where it is whole, otherwise a float. Raises ValueError/TypeError if invalid."""
+    if isinstance(value, int): # Includes bool, which has always been accepted as 0/1
+        return int(value)
+    size_val = value if isinstance(value, float) else float(value)
+    if size_val.is_integer():
+        return int(size_val)
+    if size_val != size_val or size_val in (float('inf'), float('-inf')):
+        raise ValueError(f"cannot use non-finite size {size_val}")
+    return size_val
+
+
+def _translate_boolean_condition(condition, services_by_key, warnings_list_ref):
+    operator = condition.get('operator')
+    value = condition.get('value')
+    if not (operator and isinstance(value, bool)):
+        return None, _unhandled_condition_msg('boolean')
+
+    bool_form = _BOOL_FORMS.get((operator, value))
+    if bool_form:
+        predicate_string, note = bool_form
+        if note:
+            _emit(warnings_list_ref, note)
+        return predicate_string, None
+    if value is True:
+        return None, f"Warning: Boolean operator '{operator}' (for TRUE) has no direct positive mapping. Skipping."
+    # value is False. Hydrus has no generic negation for system predicates, so there is no fallback.
+    return None, (f"CRITICAL Warning: The condition '{operator}: false' cannot be translated into a valid Hydrus "
+                  f"system predicate. The Hydrus API does not support negating this term. "
+                  f"Skipping this condition.")
+
+
+def _translate_filetype_condition(condition, services_by_key, warnings_list_ref):
+    operator = condition.get('operator')
+    value = condition.get('value')
+    if not isinstance(value, list) or not value:
+        return None, f"Warning: 'filetype' condition requires a non-empty list of values. Skipping."
+    if operator not in ['is', 'is_not']:
+        return None, _unhandled_condition_msg('filetype')
+
+    processed_values = [str(v).strip().lower() for v in value]
+    values_string = ", ".join(processed_values)
+    if operator == 'is': return f"system:filetype = {values_string}", None
+    if len(processed_values) > 1:
+        _emit(warnings_list_ref, f"Note: The 'filetype is not' operator in Hydrus works as a logical AND (e.g., not jpg AND not png).")
+    return f"system:filetype != {values_string}", None
+
+
+def _translate_url_condition(condition, services_by_key, warnings_list_ref):
+    g = condition.get
+    url_subtype, specific_url_type, operator, value = g('url_subtype'), g('specific_type'), g('operator'), g('value')
+    if not url_subtype:
+        return None, _unhandled_condition_msg('url')
+
+    url_value_str = str(value).strip() if value is not None else None
+    if url_subtype == 'specific' and specific_url_type and operator in ['is', 'is_not'] and url_value_str:
+        negation_prefix = "does not have "
+        if specific_url_type == 'regex' and operator == 'is_not': negation_prefix = "does not have a "
+        positive_verb = "has "
+        verb = positive_verb if operator == 'is' else negation_prefix
+        if specific_url_type == 'url': return f"system:{verb}url {url_value_str}", None
+        elif specific_url_type == 'domain': return f"system:{verb}domain {url_value_str}", None
+        elif specific_url_type == 'regex': return f"system:{verb}url matching regex {url_value_str}", None
+        return None, f"Warning: Unknown specific URL type '{specific_url_type}'. Skipping."
+    elif url_subtype == 'existence' and operator in ['has', 'has_not'] and value is None:
+        if operator == 'has': return "system:has urls", None
+        return "system:no urls", None # has_not
+    elif url_subtype == 'count' and operator and isinstance(value, int):
+        if operator == '=': return f"system:number of urls = {value}", None
+        elif operator == '>': return f"system:number of urls > {value}", None
+        elif operator == '<': return f"system:number of urls < {value}", None
+        elif operator == '!=':
+            _emit(warnings_list_ref, "Note: URL count '!=' translated to an OR group.")
+            return [f"system:number of urls < {value}", f"system:number of urls > {value}"], None
+        return None, f"Warning: Unsupported URL count operator '{operator}'. Skipping."
+
+    details_msg_parts = [f"Subtype: {url_subtype or 'N/A'}"]
+    if url_subtype == 'specific': details_msg_parts.append(f"SpecificType: {specific_url_type or 'N/A'}")
+    details_msg_parts.append(f"Operator: {operator or 'N/A'}")
+    if url_subtype in ['specific', 'count']: details_msg_parts.append(f"Value: {value if value is not None else 'N/A'} (Type: {type(value).__name__})")
+    return None, f"Warning: Incomplete/invalid URL condition. Details: {', '.join(details_msg_parts)}. Skipping."
+
+
+def _translate_paste_search_condition(condition, services_by_key, warnings_list_ref):
+    # paste_search is expanded by the main loop; it should never be dispatched here.
+    return None, "Dev Error: 'paste_search' type unexpectedly reached translate_single_condition_inner."
+
+
+# Ordered by how often each type is expected in Butler rules (tags and file_service first).
+# Lookup speed does not depend on the order; it documents the expected distribution. To
+# check it against real rules, run with HYDRUS_AUTOMATE_PROFILE=1 and read the
+# "Condition type counts" debug log.
+_CONDITION_HANDLERS = MappingProxyType({
+    'tags': _translate_tags_condition,
+    'file_service': _translate_file_service_condition,
+    'rating': _translate_rating_condition,
+    'boolean': _translate_boolean_condition,
+    'filesize': _translate_filesize_condition,
+    'filetype': _translate_filetype_condition,
+    'url': _translate_url_condition,
+    'paste_search': _translate_paste_search_condition,
+})
+
+# Development-time profiling of the condition types dispatched through _CONDITION_HANDLERS,
+# off unless HYDRUS_AUTOMATE_PROFILE=1.
+PROFILE_CONDITION_TYPES = os.environ.get('HYDRUS_AUTOMATE_PROFILE') == '1'
+condition_type_counts: Counter = Counter()
+
+
+def _autocorrect_paste_parts(or_parts, line_num, warnings_list_ref):
+    """Rewrites paste_search parts using the 'system:is (not) currently in' shorthand to the real predicates."""
+    transformed_or_parts = []
+    for part in or_parts:
+        original_part = part
+        transformed_part = part
+
+        # removeprefix returns the same object when the prefix is absent
+        service_name_part = part.removeprefix(_MALFORMED_IS_IN_PREFIX)
+        if service_name_part is not part:
+            transformed_part = _CORRECT_IS_IN_PREFIX + service_name_part
+        else:
+            service_name_part = part.removeprefix(_MALFORMED_IS_NOT_IN_PREFIX)
+            if service_name_part is not part:
+                transformed_part = _CORRECT_IS_NOT_IN_PREFIX + service_name_part
+
+        if transformed_part != original_part:
+            message = _PASTE_CORRECTION_NOTE.format(line=line_num + 1, original=original_part, corrected=transformed_part)
+            _emit(warnings_list_ref, message)
+        transformed_or_parts.append(transformed_part)
+    return transformed_or_parts
+
+
+def _apply_limit_condition(condition, limit_predicate_to_add, warnings_list_ref):
+    """Translates a 'limit' condition. Returns the limit predicate to use; only the first valid limit wins."""
+    raw_value = condition.get('value')
+    try:
+        val = int(raw_value)
+        if val > 0:
+            new_limit_pred = f"system:limit = {val}"
+            if limit_predicate_to_add is None:
+                return new_limit_pred
+            message = f"Note: Multiple 'Limit' conditions found. Only the first valid one ('{limit_predicate_to_add}') will be used."
+            _emit(warnings_list_ref, message)
+        else:
+            message = f"Warning: 'Limit' condition value must be a positive number, but got '{raw_value}'. Ignoring."
+            _emit(warnings_list_ref, message)
+    except (ValueError, TypeError):
+        message = f"Warning: Invalid value for 'Limit' condition: '{raw_value}'. Ignoring."
+        _emit(warnings_list_ref, message)
+    return limit_predicate_to_add
+
+
+# --- Action-derived predicates ---
+# Each handler appends the implicit predicates (and notes) for one action type. Notes that
+# must only appear once are recorded in the caller's `warning_fingerprints` set.
+
+def _add_to_action_predicates(rule_action_obj, services_by_key, local_services, force_in_special_check, string_predicates, translation_warnings, warning_fingerprints):
+    """Excludes files already in each destination service."""
+    dest_keys = rule_action_obj.get('destination_service_keys', [])
+    if isinstance(dest_keys, str): dest_keys = [dest_keys] if dest_keys else []
+    resolved = [(key, services_by_key.get(key)) for key in dest_keys if key]
+    string_predicates.extend(_fs_not_in(info['name']) for _, info in resolved if info and info.get('name'))
+    for key, info in resolved:
+        if not (info and info.get('name')):
+            message = _ADD_TO_KEY_NOT_FOUND_WARNING.format(key=key)
+            _emit(translation_warnings, message)
+
+
+def _force_in_action_predicates(rule_action_obj, services_by_key, local_services, force_in_special_check, string_predicates, translation_warnings, warning_fingerprints):
+    """Excludes files already in the destinations or, for a deep run, finds files in any other local service."""
+    if force_in_special_check:
+        # This is the corrected logic for a "deep run" to find all files that need placement correction.
+        # The goal is to find any file that exists in a local service OTHER THAN the specified destinations.
+
+        # 1. Get the rule's destination keys to know what to exclude from the search.
+        raw_dest_keys = rule_action_obj.get('destination_service_keys', [])
+        rule_dest_keys_set = set(k for k in raw_dest_keys if k) if isinstance(raw_dest_keys, list) else set()
+        if not rule_dest_keys_set:
+            message = ("CRITICAL Warning: (ForceIn Deep Run) was triggered, but the rule has no destination keys defined. "
+                       "This is an unsafe configuration that would target all files. Aborting rule translation.")
+            _emit(translation_warnings, message)
+            # By leaving string_predicates empty, the final check will catch this and abort the rule.
+
+        else:
+            # 2. Build a predicate list of local file services that are NOT the destination.
+            named_local_services = [(service.get('service_key'), name) for service in local_services if (name := service.get('name'))]
+            other_local_service_preds = [
+                _fs_in(name) for service_key, name in named_local_services
+                if service_key and service_key not in rule_dest_keys_set
+            ]
+            if len(named_local_services) != len(local_services):
+                for service in local_services:
+                    if not service.get('name'):
+                        message = f"Warning: (ForceIn Deep Run) Local service with key '{service.get('service_key')}' is missing a name and was skipped from the search."
+                        _emit(translation_warnings, message)
+
+            # 3. Add the OR group to the main predicates. This will be split by prepare_sequential_searches.
+            if other_local_service_preds:
+                string_predicates.append(_OrGroup(other_local_service_preds))
+                message = (f"Note: For 'force_in' (deep run mode), created a large OR group for {len(other_local_service_preds)} "
+                           f"local file services that are NOT the rule's destination. This search will be split for performance.")
+                _emit(translation_warnings, message)
+            else:
+                message = ("Note: (ForceIn Deep Run) Could not find any other named local file services to build the search predicate. "
+                           "This may be correct if all local services are configured as destinations for this rule.")
+                _emit(translation_warnings, message)
+    else:
+        rule_dest_keys = []
+        raw_dest_keys = rule_action_obj.get('destination_service_keys', [])
+        if isinstance(raw_dest_keys, str):
+            if raw_dest_keys: rule_dest_keys.append(raw_dest_keys)
+        elif isinstance(raw_dest_keys, list):
+            rule_dest_keys.extend([k for k in raw_dest_keys if k])
+
+        if not rule_dest_keys:
+            message = f"Warning: Action 'force_in': No destination keys defined. Cannot generate exclusion predicate."
+            _emit(translation_warnings, message)
         else:
-            common_preds_in_or_group.append(p)
-    
-    # 3. Reconstruct a list of full, sequential search queries
-    list_of_sequential_searches = []
-    base_predicates = static_preds_outside_or_group + common_preds_in_or_group
+            resolved = [(key, services_by_key.get(key)) for key in rule_dest_keys]
+            exclusion_preds = [_fs_not_in(info['name']) for _, info in resolved if info and info.get('name')]
+            string_predicates.extend(exclusion_preds)
+            for key, info in resolved:
+                if not (info and info.get('name')):
+                    message = _FORCE_IN_KEY_NOT_FOUND_WARNING.format(key=key)
+                    _emit(translation_warnings, message)
+
+            if exclusion_preds:
+                message = f"Note: For 'force_in', predicates were added to find files that are not in the destination service(s)."
+                _emit(translation_warnings, message)
+
+
+def _add_tags_action_predicates(rule_action_obj, services_by_key, local_services, force_in_special_check, string_predicates, translation_warnings, warning_fingerprints):
+    """Excludes files that already have the tags being added."""
+    tag_key_from_action = rule_action_obj.get('tag_service_key')
+    tags_to_process = rule_action_obj.get('tags_to_process', [])
+    if tag_key_from_action and tags_to_process:
+        for tag_str in tags_to_process:
+            clean_tag = tag_str.strip()
+            if clean_tag: string_predicates.append(f"-{clean_tag}")
+
+        note_fingerprint = ('add_tags_note', str(tag_key_from_action))
+        if note_fingerprint not in warning_fingerprints:
+            warning_fingerprints.add(note_fingerprint)
+            message = (
+                f"Note: For 'add_tags' action targeting service '{tag_key_from_action}', "
+                f"implicit search predicates (e.g., for tag absence) will be evaluated "
+                f"against 'all known tags' (Hydrus default)."
+            )
+            _emit(translation_warnings, message)
+    else:
+        if not tag_key_from_action:
+            message = "Warning: Action 'add_tags': missing 'tag_service_key'. Skipping generation of implicit exclusion predicates."
+            _emit(translation_warnings, message)
+        if not tags_to_process:
+            message = "Note: Action 'add_tags': 'tags_to_process' is empty. No implicit exclusion predicates generated."
+            _emit(translation_warnings, message)
+
+
+def _remove_tags_action_predicates(rule_action_obj, services_by_key, local_services, force_in_special_check, string_predicates, translation_warnings, warning_fingerprints):
+    """Finds files that have the tags being removed."""
+    tag_key_from_action = rule_action_obj.get('tag_service_key')
+    tags_to_process = rule_action_obj.get('tags_to_process', [])
+    if tag_key_from_action and tags_to_process:
+        for tag_str in tags_to_process:
+            clean_tag = tag_str.strip()
+            if clean_tag: string_predicates.append(clean_tag)
+
+        note_fingerprint = ('remove_tags_note', str(tag_key_from_action))
+        if note_fingerprint not in warning_fingerprints:
+            warning_fingerprints.add(note_fingerprint)
+            message = (
+                f"Note: For 'remove_tags' action targeting service '{tag_key_from_action}', "
+                f"implicit search predicates (e.g., for tag presence) will be evaluated "
+                f"against 'all known tags' (Hydrus default)."
+            )
+            _emit(translation_warnings, message)
+    else:
+        if not tag_key_from_action:
+            message = "Warning: Action 'remove_tags': missing 'tag_service_key'. Skipping generation of implicit inclusion predicates."
+            _emit(translation_warnings, message)
+        if not tags_to_process:
+            message = "Note: Action 'remove_tags': 'tags_to_process' is empty. No implicit inclusion predicates generated."
+            _emit(translation_warnings, message)
+
+
+def _modify_rating_action_predicates(rule_action_obj, services_by_key, local_services, force_in_special_check, string_predicates, translation_warnings, warning_fingerprints):
+    """Excludes files whose rating is already the target value."""
+    rating_key = rule_action_obj.get('rating_service_key')
+    target_val = rule_action_obj.get('rating_value')
+    info = services_by_key.get(rating_key)
+    if info and info.get('name'):
+        s_name = info['name']; s_type = info['type']; s_max_stars = info.get('max_stars')
+        action_exclusion_preds = []
+        if target_val is None:
+            action_exclusion_preds.append(f"system:has a rating for {s_name}")
+        elif isinstance(target_val, bool):
+            if s_type == 7:
+                other_state_keyword = 'dislike' if target_val is True else 'like'
+                action_exclusion_preds.append(f"system:rating for {s_name} is {other_state_keyword}")
+                action_exclusion_preds.append(f"system:does not have a rating for {s_name}")
+            else:
+                message = f"Note: Action modify_rating (bool) for non-Like/Dislike service '{s_name}'. No specific exclusion."
+                _emit(translation_warnings, message)
+        elif isinstance(target_val, (int, float)):
+            num_target = int(target_val)
+            if s_type in (6, 22):
+                # Numerical stars carry a '/max_stars' suffix; inc/dec ratings have none.
+                stars_suffix = f"/{s_max_stars}" if (s_type == 6 and s_max_stars) else ""
+                rating_base = _rating_base(s_name)
+                action_exclusion_preds.extend((
+                    f"system:does not have a rating for {s_name}",
+                    f"{rating_base} < {num_target}{stars_suffix}",
+                    f"{rating_base} > {num_target}{stars_suffix}",
+                ))
+            else:
+                message = f"Note: Action modify_rating (num) for non-num/incdec service '{s_name}'. No specific exclusion."
+                _emit(translation_warnings, message)
+
+        if action_exclusion_preds:
+            if target_val is None:
+                # For "set to no rating", we only want files that HAVE a rating.
+                string_predicates.append(f"system:has a rating for {s_name}")
+            else:
+                # For setting a specific value, we want an OR group of all other states.
+                string_predicates.append(_OrGroup(action_exclusion_preds))
+        elif not any("No specific exclusion" in w['message'] for w in translation_warnings if f"'{s_name}'" in w['message']) and target_val is not None:
+            message = f"Note: Action modify_rating for '{s_name}' to '{target_val}': No specific search exclusion predicates added. Relying on post-search override logic or Hydrus idempotency."
+            _emit(translation_warnings, message)
+    elif rating_key:
+         message = f"Warning: Action modify_rating: service key '{rating_key}' not found for exclusion. Skipping specific search exclusion predicates."
+         _emit(translation_warnings, message)
 
-    for file_service_pred in file_service_preds_for_sequencing:
-        # Each new search is the base query PLUS one of the file service predicates
-        new_search_query = base_predicates + [file_service_pred]
-        list_of_sequential_searches.append(new_search_query)
 
-    return list_of_sequential_searches
+_ACTION_PREDICATE_HANDLERS = MappingProxyType({
+    'add_to': _add_to_action_predicates,
+    'force_in': _force_in_action_predicates,
+    'add_tags': _add_tags_action_predicates,
+    'remove_tags': _remove_tags_action_predicates,
+    'modify_rating': _modify_rating_action_predicates,
+})
 
 
 def translate_rule_to_hydrus_predicates(
@@ -129,244 +742,43 @@ def translate_rule_to_hydrus_predicates(
 
     string_predicates = []
     translation_warnings = []
+    # Notes emitted at most once per translation, keyed by fingerprint rather than found by rescanning the warnings
+    warning_fingerprints = set()
     limit_predicate_to_add = None # Variable to store the single valid limit predicate
 
-    def get_service_details(service_key):
-        if not isinstance(available_services_list, list):
-            logger.critical(f"Rule '{rule_name_for_log}': available_services_list not a list in get_service_details. This is a program flow error.")
-            return None
-        return next((s for s in available_services_list if isinstance(s, dict) and s.get('service_key') == service_key), None)
-
-    def translate_single_condition_inner(condition, warnings_list_ref):
+    # Index services by key once so every lookup below is O(1). setdefault keeps the
+    # first entry for a key, matching the previous linear-scan behaviour. Local file
+    # services (type 2) are collected in the same pass for the force_in deep run.
+    services_by_key = {}
+    local_services = []
+    if isinstance(available_services_list, list):
+        for service in available_services_list:
+            if isinstance(service, dict):
+                services_by_key.setdefault(service.get('service_key'), service)
+                if service.get('type') == 2:
+                    local_services.append(service)
+    else:
+        logger.critical(f"Rule '{rule_name_for_log}': available_services_list not a list in translate_rule_to_hydrus_predicates. This is a program flow error.")
+
+    def translate_single_condition_inner(condition):
         # Translates individual conditions (tags, rating, file_service, etc.)
-        # into Hydrus predicate strings.
-        condition_type = condition.get('type')
-        url_subtype = condition.get('url_subtype')
-        specific_url_type = condition.get('specific_type')
-        operator = condition.get('operator')
-        value = condition.get('value')
-        condition_service_key = condition.get('service_key') # This is for 'rating' type
-        unit = condition.get('unit')
+        # into Hydrus predicate strings via the per-type handlers in _CONDITION_HANDLERS.
+        # Returns (predicate, cond_warnings); the caller extends its own list once.
+        g = condition.get
+        condition_type = g('type')
+        if PROFILE_CONDITION_TYPES:
+            condition_type_counts[str(condition_type)] += 1
 
         predicate_string = None
         warning_msg = None
+        cond_warnings = []
 
         try:
-            if condition_type == 'tags' and operator == 'search_terms' and isinstance(value, list):
-                if value:
-                    return value # Returns a list of tags, not a single predicate string
-                else:
-                    warning_msg = f"Warning: Empty tags list in condition. Skipping condition."
-
-            elif condition_type == 'rating' and condition_service_key and operator:
-                service_info = get_service_details(condition_service_key)
-                if not service_info:
-                    warning_msg = f"Warning: Rating service with key {condition_service_key} not found. Skipping condition."
-                else:
-                    service_name = service_info['name']
-                    service_type = service_info.get('type')
-                    max_stars = service_info.get('max_stars')
-
-                    if operator == 'no_rating' and value is None:
-                        predicate_string = f"system:does not have a rating for {service_name}"
-                    elif operator == 'has_rating' and value is None:
-                        predicate_string = f"system:has a rating for {service_name}"
-                    elif service_type == 7: # Like/Dislike
-                        predicate_base_for_rating = f"system:rating for {service_name}"
-                        if operator == 'is':
-                            if isinstance(value, bool):
-                                keyword = 'like' if value is True else 'dislike'
-                                predicate_string = f"{predicate_base_for_rating} is {keyword}"
-                            else:
-                                warning_msg = f"Warning: Unsupported value type '{type(value).__name__}' for 'is' on like/dislike rating '{service_name}'. Expected boolean. Skipping condition."
-                        else:
-                            warning_msg = f"Warning: Unsupported operator '{operator}' for like/dislike rating '{service_name}' (excluding 'no_rating', 'has_rating'). Skipping condition."
-                    elif service_type == 6: # Numerical Stars
-                        predicate_base_for_rating = f"system:rating for {service_name}"
-                        if isinstance(value, (int, float)):
-                            numeric_value = int(value)
-                            if operator == 'is':
-                                predicate_string = f"{predicate_base_for_rating} = {numeric_value}"
-                                if max_stars is not None and max_stars > 0: predicate_string += f"/{max_stars}"
-                                else:
-                                    message = f"Note: 'is {numeric_value}' for numerical rating '{service_name}' without max_stars. Standard numerical equality assumed."
-                                    level = 'critical' if is_critical_warning(message) else 'info'
-                                    warnings_list_ref.append({'level': level, 'message': message})
-                            elif operator == 'more_than':
-                                predicate_string = f"{predicate_base_for_rating} > {numeric_value}"
-                                if max_stars is not None and max_stars > 0: predicate_string += f"/{max_stars}"
-                            elif operator == 'less_than':
-                                predicate_string = f"{predicate_base_for_rating} < {numeric_value}"
-                                if max_stars is not None and max_stars > 0: predicate_string += f"/{max_stars}"
-                            elif operator == '!=':
-                                less_than_pred = f"{predicate_base_for_rating} < {numeric_value}"
-                                more_than_pred = f"{predicate_base_for_rating} > {numeric_value}"
-                                if max_stars is not None and max_stars > 0:
-                                    less_than_pred += f"/{max_stars}"
-                                    more_than_pred += f"/{max_stars}"
-                                predicate_string = [less_than_pred, more_than_pred]
-                                message = f"Note: Numerical rating '!=' for '{service_name}' translated to OR group: [{less_than_pred}, {more_than_pred}]."
-                                level = 'critical' if is_critical_warning(message) else 'info'
-                                warnings_list_ref.append({'level': level, 'message': message})
-                            else:
-                                warning_msg = f"Warning: Unsupported operator '{operator}' for numerical rating '{service_name}'. Skipping condition."
-                        else:
-                            warning_msg = f"Warning: Invalid value '{value}' for numerical rating '{service_name}'. Expected number. Skipping condition."
-                    elif service_type == 22: # Increment/Decrement
-                        predicate_base_for_rating = f"system:rating for {service_name}"
-                        if isinstance(value, (int, float)):
-                            numeric_value = int(value)
-                            if operator == 'is': predicate_string = f"{predicate_base_for_rating} = {numeric_value}"
-                            elif operator == 'more_than': predicate_string = f"{predicate_base_for_rating} > {numeric_value}"
-                            elif operator == 'less_than': predicate_string = f"{predicate_base_for_rating} < {numeric_value}"
-                            elif operator == '!=':
-                                less_than_pred = f"{predicate_base_for_rating} < {numeric_value}"
-                                more_than_pred = f"{predicate_base_for_rating} > {numeric_value}"
-                                predicate_string = [less_than_pred, more_than_pred]
-                                message = f"Note: Inc/dec rating '!=' for '{service_name}' translated to OR group: [{less_than_pred}, {more_than_pred}]."
-                                level = 'critical' if is_critical_warning(message) else 'info'
-                                warnings_list_ref.append({'level': level, 'message': message})
-                            else: warning_msg = f"Warning: Unsupported operator '{operator}' for inc/dec rating '{service_name}'. Skipping condition."
-                        else: warning_msg = f"Warning: Invalid value '{value}' for inc/dec rating '{service_name}'. Expected number. Skipping condition."
-            elif condition_type == 'file_service':
-                if value and operator in ['is_in', 'is_not_in']:
-                    service_info = get_service_details(value)
-                    if not service_info:
-                        warning_msg = f"Warning: File service key '{value}' (from 'value' field) not found for 'file_service' condition. Skipping condition."
-                    else:
-                        service_name_for_predicate = service_info['name']
-                        if operator == 'is_in':
-                            predicate_string = f"system:file service currently in {service_name_for_predicate}"
-                        else: # is_not_in
-                            predicate_string = f"system:file service is not currently in {service_name_for_predicate}"
-                else:
-                    details_for_log = []
-                    if not value: details_for_log.append("missing service key (expected in 'value' field)")
-                    if operator not in ['is_in', 'is_not_in']:
-                        details_for_log.append(f"unexpected operator '{operator}' (expected 'is_in' or 'is_not_in')")
-                    if details_for_log:
-                        warning_msg = f"Warning: Malformed 'file_service' condition ({', '.join(details_for_log)}). Skipping condition."
-                    else:
-                        warning_msg = f"Warning: Unhandled 'file_service' condition variant. Skipping condition."
-
-            elif condition_type == 'filesize' and operator and value is not None and unit:
-                 hydrus_operator_map = { '=': '~=', '>': '>', '<': '<', '!=': '≠' }
-                 hydrus_op = hydrus_operator_map.get(operator)
-                 if not hydrus_op:
-                     warning_msg = f"Warning: Unsupported filesize operator '{operator}'. Using direct symbol. Skipping condition."
-                 hydrus_unit_map = { 'bytes': 'B', 'KB': 'kilobytes', 'MB': 'megabytes', 'GB': 'GB'}
-                 hydrus_unit_str = hydrus_unit_map.get(unit)
-                 if not hydrus_unit_str:
-                     warning_msg = f"Warning: Invalid filesize unit '{unit}'. Skipping condition."
-                 elif warning_msg:
-                     pass
-                 else:
-                    try:
-                        size_val = float(value)
-                        formatted_size_val = int(size_val) if size_val == int(size_val) else size_val
-                        predicate_string = f"system:filesize {hydrus_op} {formatted_size_val} {hydrus_unit_str}"
-                        if operator == '!=':
-                             message = f"Note: Filesize '!=' translated to Hydrus '≠'."
-                             level = 'critical' if is_critical_warning(message) else 'info'
-                             warnings_list_ref.append({'level': level, 'message': message})
-                    except (ValueError, TypeError) as e:
-                        warning_msg = f"Warning: Invalid filesize value '{value}': {e}. Skipping condition."
-
-            elif condition_type == 'boolean' and operator and isinstance(value, bool):
-                positive_forms = {
-                    'inbox': 'system:inbox', 'archive': 'system:archive',
-                    'local': 'system:file service currently in all local files',
-                    'trashed': 'system:file service currently in trash',
-                    'deleted': 'system:is deleted',
-                    'has_duration': 'system:has duration',
-                    'is_the_best_quality_file_of_its_duplicate_group': 'system:is the best quality file of its duplicate group',
-                    'has_audio': 'system:has audio', 'has_exif': 'system:has exif',
-                    'has_embedded_metadata': 'system:has embedded metadata',
-                    'has_icc_profile': 'system:has icc profile',
-                    'has_tags': 'system:has tags',
-                    'has_notes': 'system:has notes',
-                    'has_transparency': 'system:has transparency',
-                }
-                negative_forms = {
-                    'local': 'system:file service is not currently in all local files',
-                    'trashed': 'system:file service is not currently in trash',
-                    'has_duration': 'system:no duration',
-                    'is_the_best_quality_file_of_its_duplicate_group': 'system:is not the best quality file of its duplicate group',
-                    'has_audio': 'system:no audio', 'has_exif': 'system:no exif',
-                    'has_embedded_metadata': 'system:no embedded metadata',
-                    'has_icc_profile': 'system:no icc profile',
-                    'has_tags': 'system:no tags', # Hydrus synonym for 'system:untagged'
-                    'has_notes': 'system:does not have notes', # Hydrus synonym for 'system:no notes'
-                    'has_transparency': 'system:no transparency',
-                }
-                if value is True:
-                    if operator in positive_forms: predicate_string = positive_forms[operator]
-                    else: warning_msg = f"Warning: Boolean operator '{operator}' (for TRUE) has no direct positive mapping. Skipping."
-                else: # value is False
-                    if operator in negative_forms:
-                        predicate_string = negative_forms[operator]
-                        if operator == 'has_tags':
-                            message = "Note: 'has_tags is false' mapped to 'system:no tags'. 'system:untagged' is an equivalent option."
-                            level = 'critical' if is_critical_warning(message) else 'info'
-                            warnings_list_ref.append({'level': level, 'message': message})
-                        if operator == 'has_notes':
-                             message = "Note: 'has_notes is false' mapped to 'system:no notes'."
-                             level = 'critical' if is_critical_warning(message) else 'info'
-                             warnings_list_ref.append({'level': level, 'message': message})
-                    else:
-                        warning_msg = (f"CRITICAL Warning: The condition '{operator}: false' cannot be translated into a valid Hydrus "
-                                       f"system predicate. The Hydrus API does not support negating this term. "
-                                       f"Skipping this condition.")
-
-            elif condition_type == 'filetype' and operator in ['is', 'is_not'] and isinstance(value, list) and value:
-                 processed_values = [str(v).strip().lower() for v in value]
-                 values_string = ", ".join(processed_values)
-                 if operator == 'is': predicate_string = f"system:filetype = {values_string}"
-                 elif operator == 'is_not':
-                     predicate_string = f"system:filetype != {values_string}"
-                     if len(processed_values) > 1:
-                         message = f"Note: The 'filetype is not' operator in Hydrus works as a logical AND (e.g., not jpg AND not png)."
-                         level = 'critical' if is_critical_warning(message) else 'info'
-                         warnings_list_ref.append({'level': level, 'message': message})
-                 else: warning_msg = f"Warning: Unexpected operator '{operator}' for filetype. Skipping."
-            elif condition_type == 'filetype' and (not isinstance(value, list) or not value):
-                 warning_msg = f"Warning: 'filetype' condition requires a non-empty list of values. Skipping."
-
-            elif condition_type == 'url' and url_subtype:
-                url_value_str = str(value).strip() if value is not None else None
-                if url_subtype == 'specific' and specific_url_type and operator in ['is', 'is_not'] and url_value_str:
-                    negation_prefix = "does not have "
-                    if specific_url_type == 'regex' and operator == 'is_not': negation_prefix = "does not have a "
-                    positive_verb = "has "
-                    verb = positive_verb if operator == 'is' else negation_prefix
-                    if specific_url_type == 'url': predicate_string = f"system:{verb}url {url_value_str}"
-                    elif specific_url_type == 'domain': predicate_string = f"system:{verb}domain {url_value_str}"
-                    elif specific_url_type == 'regex': predicate_string = f"system:{verb}url matching regex {url_value_str}"
-                    else: warning_msg = f"Warning: Unknown specific URL type '{specific_url_type}'. Skipping."
-                elif url_subtype == 'existence' and operator in ['has', 'has_not'] and value is None:
-                    if operator == 'has': predicate_string = "system:has urls"
-                    elif operator == 'has_not': predicate_string = "system:no urls"
-                elif url_subtype == 'count' and operator and isinstance(value, int):
-                    if operator == '=': predicate_string = f"system:number of urls = {value}"
-                    elif operator == '>': predicate_string = f"system:number of urls > {value}"
-                    elif operator == '<': predicate_string = f"system:number of urls < {value}"
-                    elif operator == '!=':
-                        predicate_string = [f"system:number of urls < {value}", f"system:number of urls > {value}"]
-                        message = "Note: URL count '!=' translated to an OR group."
-                        level = 'critical' if is_critical_warning(message) else 'info'
-                        warnings_list_ref.append({'level': level, 'message': message})
-                    else: warning_msg = f"Warning: Unsupported URL count operator '{operator}'. Skipping."
-                else:
-                    details_msg_parts = [f"Subtype: {url_subtype or 'N/A'}"]
-                    if url_subtype == 'specific': details_msg_parts.append(f"SpecificType: {specific_url_type or 'N/A'}")
-                    details_msg_parts.append(f"Operator: {operator or 'N/A'}")
-                    if url_subtype in ['specific', 'count']: details_msg_parts.append(f"Value: {value if value is not None else 'N/A'} (Type: {type(value).__name__})")
-                    warning_msg = f"Warning: Incomplete/invalid URL condition. Details: {', '.join(details_msg_parts)}. Skipping."
-
-            elif condition_type == 'paste_search':
-                warning_msg = "Dev Error: 'paste_search' type unexpectedly reached translate_single_condition_inner."
+            handler = _CONDITION_HANDLERS.get(condition_type) if isinstance(condition_type, str) else None
+            if handler:
+                predicate_string, warning_msg = handler(condition, services_by_key, cond_warnings)
             elif condition_type:
-                warning_msg = f"Warning: Unhandled condition type '{condition_type}'. Skipping."
+                warning_msg = _unhandled_condition_msg(condition_type)
             else:
                 warning_msg = "Warning: Condition has no type. Skipping."
         except Exception as e:
@@ -374,387 +786,137 @@ def translate_rule_to_hydrus_predicates(
             logger.error(f"Rule '{rule_name_for_log}': {warning_msg}", exc_info=True)
 
         if warning_msg:
-            ws_ref_is_list = isinstance(warnings_list_ref, list)
-            if ws_ref_is_list:
-                 full_message = f"Cond (type: {condition.get('type','N/A')}, op: {condition.get('operator','N/A')}): {warning_msg}"
-                 level = 'critical' if is_critical_warning(full_message) else 'info'
-                 warnings_list_ref.append({'level': level, 'message': full_message})
-            else:
-                 logger.critical(f"Rule '{rule_name_for_log}': CRITICAL - warnings_list_ref is not a list in translate_single_condition_inner.")
-        return predicate_string
+            full_message = f"Cond (type: {g('type','N/A')}, op: {g('operator','N/A')}): {warning_msg}"
+            _emit(cond_warnings, full_message)
+        return predicate_string, cond_warnings
+
+    # Set while translating when a condition is one the user meant to narrow the search with,
+    # for the empty-search safety check at the end.
+    saw_substantive_condition = False
+
+    # Empty and limit-only rules are common and need no per-condition dispatch.
+    only_limit_conditions = all(isinstance(c, dict) and c.get('type') == 'limit' for c in rule_conditions_list)
+    if only_limit_conditions:
+        for condition in rule_conditions_list:
+            limit_predicate_to_add = _apply_limit_condition(condition, limit_predicate_to_add, translation_warnings)
+        conditions_to_translate = ()
+    else:
+        conditions_to_translate = rule_conditions_list
 
     # Main loop for translate_rule_to_hydrus_predicates
-    for condition_idx, condition in enumerate(rule_conditions_list):
+    for condition_idx, condition in enumerate(conditions_to_translate):
         if not isinstance(condition, dict):
             message = f"Warning: Cond at idx {condition_idx} not dict. Skipping: {str(condition)[:100]}"
-            level = 'critical' if is_critical_warning(message) else 'info'
-            translation_warnings.append({'level': level, 'message': message})
+            _emit(translation_warnings, message)
             continue
 
         condition_type = condition.get('type')
         if condition_type == 'limit':
-            try:
-                val = int(condition.get('value'))
-                if val > 0:
-                    new_limit_pred = f"system:limit = {val}"
-                    if limit_predicate_to_add is None:
-                        limit_predicate_to_add = new_limit_pred
-                    else:
-                        message = f"Note: Multiple 'Limit' conditions found. Only the first valid one ('{limit_predicate_to_add}') will be used."
-                        level = 'critical' if is_critical_warning(message) else 'info'
-                        translation_warnings.append({'level': level, 'message': message})
-                else:
-                    message = f"Warning: 'Limit' condition value must be a positive number, but got '{condition.get('value')}'. Ignoring."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-            except (ValueError, TypeError):
-                message = f"Warning: Invalid value for 'Limit' condition: '{condition.get('value')}'. Ignoring."
-                level = 'critical' if is_critical_warning(message) else 'info'
-                translation_warnings.append({'level': level, 'message': message})
+            limit_predicate_to_add = _apply_limit_condition(condition, limit_predicate_to_add, translation_warnings)
             continue
 
         if condition_type == 'or_group':
             nested_conditions_data = condition.get('conditions', [])
+            if nested_conditions_data: saw_substantive_condition = True
             if not isinstance(nested_conditions_data, list) or not nested_conditions_data:
                 message = f"Warning: OR group idx {condition_idx} empty/invalid. Skipping."
-                level = 'critical' if is_critical_warning(message) else 'info'
-                translation_warnings.append({'level': level, 'message': message})
+                _emit(translation_warnings, message)
                 continue
             nested_predicate_list = []
+            nested_predicates_seen = set() # Repeated alternatives add nothing to an OR
+            group_warnings = [] # Collected across the group and added to translation_warnings once
             for nested_cond_idx, nested_cond in enumerate(nested_conditions_data):
                 if not isinstance(nested_cond, dict) or nested_cond.get('type') in ['or_group', 'paste_search']:
                     message = f"Warning: Invalid nested item in OR group (idx {condition_idx}, nested_idx {nested_cond_idx}). Skipping nested."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
+                    _emit(group_warnings, message)
                     continue
-                nested_res = translate_single_condition_inner(nested_cond, translation_warnings)
+                nested_res, nested_warnings = translate_single_condition_inner(nested_cond)
+                group_warnings.extend(nested_warnings)
                 if nested_res:
-                    if isinstance(nested_res, list): nested_predicate_list.extend(nested_res)
-                    else: nested_predicate_list.append(nested_res)
-            if nested_predicate_list: string_predicates.append(nested_predicate_list)
+                    for nested_pred in (nested_res if isinstance(nested_res, list) else (nested_res,)):
+                        if isinstance(nested_pred, str):
+                            if nested_pred in nested_predicates_seen: continue
+                            nested_predicates_seen.add(nested_pred)
+                        nested_predicate_list.append(nested_pred)
+            translation_warnings.extend(group_warnings)
+            if len(nested_predicate_list) == 1:
+                # A one-alternative OR is just that predicate; keep it out of the OR-group handling.
+                string_predicates.append(nested_predicate_list[0])
+            elif nested_predicate_list: string_predicates.append(_OrGroup(nested_predicate_list))
             else:
                 message = f"Warning: OR group idx {condition_idx} yielded no predicates."
-                level = 'critical' if is_critical_warning(message) else 'info'
-                translation_warnings.append({'level': level, 'message': message})
+                _emit(translation_warnings, message)
         elif condition_type == 'paste_search':
             raw_text = condition.get('value')
             if not isinstance(raw_text, str) or not raw_text.strip():
                 message = f"Warning: 'paste_search' idx {condition_idx} empty. Skipping."
-                level = 'critical' if is_critical_warning(message) else 'info'
-                translation_warnings.append({'level': level, 'message': message})
+                _emit(translation_warnings, message)
                 continue
-            lines = raw_text.strip().split('\n')
+            paste_text = raw_text.strip()
             parsed_paste_preds = []
-            for line_num, line in enumerate(lines):
-                s_line = line.strip()
-                if not s_line or s_line.startswith('#'): continue
+            saw_content_line = False
+            line_num, scanned_to = 0, 0 # 0-based line number of the current match, counted incrementally
+            for line_match in _PASTE_LINE_RE.finditer(paste_text):
+                s_line = line_match.group(1)
+                line_num += paste_text.count('\n', scanned_to, line_match.start())
+                scanned_to = line_match.start()
+                if not s_line: continue
+                saw_content_line = True
                 if s_line.lower().startswith('system:limit'):
                     message = f"Note: Ignored 'system:limit' in paste_search (line {line_num + 1})."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
+                    _emit(translation_warnings, message)
                     continue
 
-                or_parts_raw = [p.strip() for p in s_line.split(' OR ') if p.strip()]
-                transformed_or_parts = []
-
-                malformed_is_in_prefix = "system:is currently in "
-                correct_is_in_prefix = "system:file service currently in "
-                malformed_is_not_in_prefix = "system:is not currently in "
-                correct_is_not_in_prefix = "system:file service is not currently in "
-
-                for part in or_parts_raw:
-                    original_part = part
-                    transformed_part = part
-
-                    if part.startswith(malformed_is_in_prefix):
-                        service_name_part = part[len(malformed_is_in_prefix):]
-                        transformed_part = correct_is_in_prefix + service_name_part
-                    elif part.startswith(malformed_is_not_in_prefix):
-                        service_name_part = part[len(malformed_is_not_in_prefix):]
-                        transformed_part = correct_is_not_in_prefix + service_name_part
-
-                    if transformed_part != original_part:
-                        message = f"Note (PasteSearch, Line {line_num + 1}): Auto-corrected predicate '{original_part}' to '{transformed_part}'."
-                        level = 'critical' if is_critical_warning(message) else 'info'
-                        translation_warnings.append({'level': level, 'message': message})
-                    transformed_or_parts.append(transformed_part)
+                or_parts_raw = [stripped for p in s_line.split(' OR ') if (stripped := p.strip())]
+                # Only lines containing the malformed shorthand need the per-part prefix checks.
+                if _MALFORMED_PREFIX_STEM in s_line:
+                    transformed_or_parts = _autocorrect_paste_parts(or_parts_raw, line_num, translation_warnings)
+                else:
+                    transformed_or_parts = or_parts_raw
 
                 if len(transformed_or_parts) > 1:
-                    parsed_paste_preds.append(transformed_or_parts)
+                    parsed_paste_preds.append(_OrGroup(transformed_or_parts))
                 elif transformed_or_parts:
                     parsed_paste_preds.append(transformed_or_parts[0])
 
+            if saw_content_line: saw_substantive_condition = True
             if parsed_paste_preds:
                 string_predicates.extend(parsed_paste_preds)
-            elif raw_text.strip() and not all(l.strip().startswith('#') or not l.strip() for l in lines):
+            elif saw_content_line:
                 message = f"Warning: 'paste_search' idx {condition_idx} with content yielded no usable predicates after processing."
-                level = 'critical' if is_critical_warning(message) else 'info'
-                translation_warnings.append({'level': level, 'message': message})
+                _emit(translation_warnings, message)
         else:
-            res = translate_single_condition_inner(condition, translation_warnings)
+            if condition_type: saw_substantive_condition = True
+            res, cond_warnings = translate_single_condition_inner(condition)
+            translation_warnings.extend(cond_warnings)
             if res:
-                if isinstance(res, list) and condition.get('type') == 'tags':
+                if isinstance(res, list) and condition_type == 'tags':
                     string_predicates.extend(res)
                 elif isinstance(res, list):
-                    string_predicates.append(res)
+                    string_predicates.append(_OrGroup(res))
                 else:
                     string_predicates.append(res)
 
     # Action-Based Exclusion/Inclusion Predicates
-    if rule_action_obj and isinstance(rule_action_obj, dict):
-        action_type = rule_action_obj.get('type')
-        if action_type == 'add_to':
-            dest_keys = rule_action_obj.get('destination_service_keys', [])
-            if isinstance(dest_keys, str): dest_keys = [dest_keys] if dest_keys else []
-            for key in dest_keys:
-                if not key: continue
-                info = get_service_details(key)
-                if info and info.get('name'):
-                    service_name_for_predicate = info['name']
-                    string_predicates.append(f"system:file service is not currently in {service_name_for_predicate}")
-                else:
-                    message = f"Warning: Action 'add_to': service key '{key}' not found for exclusion. Skipping exclusion."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-
-        elif action_type == 'force_in':
-            if force_in_special_check:
-                # This is the corrected logic for a "deep run" to find all files that need placement correction.
-                # The goal is to find any file that exists in a local service OTHER THAN the specified destinations.
-                
-                # 1. Get the rule's destination keys to know what to exclude from the search.
-                raw_dest_keys = rule_action_obj.get('destination_service_keys', [])
-                rule_dest_keys_set = set(k for k in raw_dest_keys if k) if isinstance(raw_dest_keys, list) else set()
-                if not rule_dest_keys_set:
-                    message = ("CRITICAL Warning: (ForceIn Deep Run) was triggered, but the rule has no destination keys defined. "
-                               "This is an unsafe configuration that would target all files. Aborting rule translation.")
-                    translation_warnings.append({'level': 'critical', 'message': message})
-                    # By leaving string_predicates empty, the final check will catch this and abort the rule.
-                
-                else:
-                    # 2. Get all local file services.
-                    all_local_services = [s for s in available_services_list if isinstance(s, dict) and s.get('type') == 2]
-                    
-                    # 3. Build a predicate list of services that are NOT the destination.
-                    other_local_service_preds = []
-                    for service in all_local_services:
-                        service_key = service.get('service_key')
-                        service_name = service.get('name')
-                        if service_key and service_name and service_key not in rule_dest_keys_set:
-                            other_local_service_preds.append(f"system:file service currently in {service['name']}")
-                        elif not service_name:
-                            message = f"Warning: (ForceIn Deep Run) Local service with key '{service_key}' is missing a name and was skipped from the search."
-                            level = 'critical' if is_critical_warning(message) else 'info'
-                            translation_warnings.append({'level': level, 'message': message})
-
-                    # 4. Add the OR group to the main predicates. This will be split by prepare_sequential_searches.
-                    if other_local_service_preds:
-                        string_predicates.append(other_local_service_preds)
-                        message = (f"Note: For 'force_in' (deep run mode), created a large OR group for {len(other_local_service_preds)} "
-                                   f"local file services that are NOT the rule's destination. This search will be split for performance.")
-                        level = 'critical' if is_critical_warning(message) else 'info'
-                        translation_warnings.append({'level': level, 'message': message})
-                    else:
-                        message = ("Note: (ForceIn Deep Run) Could not find any other named local file services to build the search predicate. "
-                                   "This may be correct if all local services are configured as destinations for this rule.")
-                        level = 'critical' if is_critical_warning(message) else 'info'
-                        translation_warnings.append({'level': level, 'message': message})
-            else:
-                rule_dest_keys = []
-                raw_dest_keys = rule_action_obj.get('destination_service_keys', [])
-                if isinstance(raw_dest_keys, str):
-                    if raw_dest_keys: rule_dest_keys.append(raw_dest_keys)
-                elif isinstance(raw_dest_keys, list):
-                    rule_dest_keys.extend([k for k in raw_dest_keys if k])
-
-                if not rule_dest_keys:
-                    message = f"Warning: Action 'force_in': No destination keys defined. Cannot generate exclusion predicate."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-                else:
-                    predicates_added = False
-                    for key in rule_dest_keys:
-                        info = get_service_details(key)
-                        if info and info.get('name'):
-                            service_name_for_predicate = info['name']
-                            string_predicates.append(f"system:file service is not currently in {service_name_for_predicate}")
-                            predicates_added = True
-                        else:
-                            message = f"Warning: Action 'force_in': destination service key '{key}' not found. Cannot add exclusion predicate for it."
-                            level = 'critical' if is_critical_warning(message) else 'info'
-                            translation_warnings.append({'level': level, 'message': message})
-                    
-                    if predicates_added:
-                        message = f"Note: For 'force_in', predicates were added to find files that are not in the destination service(s)."
-                        level = 'critical' if is_critical_warning(message) else 'info'
-                        translation_warnings.append({'level': level, 'message': message})
-
-        elif action_type == 'add_tags':
-            tag_key_from_action = rule_action_obj.get('tag_service_key')
-            tags_to_process = rule_action_obj.get('tags_to_process', [])
-            if tag_key_from_action and tags_to_process:
-                for tag_str in tags_to_process:
-                    clean_tag = tag_str.strip()
-                    if clean_tag: string_predicates.append(f"-{clean_tag}")
-
-                relevant_note_exists = any(
-                    ("predicates for 'add_tags'" in w['message'] and f"targeting service '{tag_key_from_action}'" in w['message'] and "evaluated against 'all known tags'" in w['message']) or
-                    ("evaluated against 'all known tags'" in w['message'] and "'add_tags'" in w['message'] and f"targeting service '{tag_key_from_action}'" in w['message'])
-                    for w in translation_warnings
-                )
-                if not relevant_note_exists:
-                    message = (
-                        f"Note: For 'add_tags' action targeting service '{tag_key_from_action}', "
-                        f"implicit search predicates (e.g., for tag absence) will be evaluated "
-                        f"against 'all known tags' (Hydrus default)."
-                    )
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-            else:
-                if not tag_key_from_action:
-                    message = "Warning: Action 'add_tags': missing 'tag_service_key'. Skipping generation of implicit exclusion predicates."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-                if not tags_to_process:
-                    message = "Note: Action 'add_tags': 'tags_to_process' is empty. No implicit exclusion predicates generated."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-
-        elif action_type == 'remove_tags':
-            tag_key_from_action = rule_action_obj.get('tag_service_key')
-            tags_to_process = rule_action_obj.get('tags_to_process', [])
-            if tag_key_from_action and tags_to_process:
-                for tag_str in tags_to_process:
-                    clean_tag = tag_str.strip()
-                    if clean_tag: string_predicates.append(clean_tag)
-
-                relevant_note_exists = any(
-                    ("predicates for 'remove_tags'" in w['message'] and f"targeting service '{tag_key_from_action}'" in w['message'] and "evaluated against 'all known tags'" in w['message']) or
-                    ("evaluated against 'all known tags'" in w['message'] and "'remove_tags'" in w['message'] and f"targeting service '{tag_key_from_action}'" in w['message'])
-                    for w in translation_warnings
-                )
-                if not relevant_note_exists:
-                     message = (
-                         f"Note: For 'remove_tags' action targeting service '{tag_key_from_action}', "
-                         f"implicit search predicates (e.g., for tag presence) will be evaluated "
-                         f"against 'all known tags' (Hydrus default)."
-                     )
-                     level = 'critical' if is_critical_warning(message) else 'info'
-                     translation_warnings.append({'level': level, 'message': message})
-            else:
-                if not tag_key_from_action:
-                    message = "Warning: Action 'remove_tags': missing 'tag_service_key'. Skipping generation of implicit inclusion predicates."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-                if not tags_to_process:
-                    message = "Note: Action 'remove_tags': 'tags_to_process' is empty. No implicit inclusion predicates generated."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-
-        elif action_type == 'remove_tags':
-            tag_key_from_action = rule_action_obj.get('tag_service_key')
-            tags_to_process = rule_action_obj.get('tags_to_process', [])
-            if tag_key_from_action and tags_to_process:
-                for tag_str in tags_to_process:
-                    clean_tag = tag_str.strip()
-                    if clean_tag: string_predicates.append(clean_tag)
-
-                relevant_note_exists = any(
-                    ("predicates for 'remove_tags'" in w and f"targeting service '{tag_key_from_action}'" in w and "evaluated against 'all known tags'" in w) or
-                    ("evaluated against 'all known tags'" in w and "'remove_tags'" in w and f"targeting service '{tag_key_from_action}'" in w)
-                    for w in translation_warnings
-                )
-                if not relevant_note_exists:
-                     message = (
-                         f"Note: For 'remove_tags' action targeting service '{tag_key_from_action}', "
-                         f"implicit search predicates (e.g., for tag presence) will be evaluated "
-                         f"against 'all known tags' (Hydrus default)."
-                     )
-                     level = 'critical' if is_critical_warning(message) else 'info'
-                     translation_warnings.append({'level': level, 'message': message})
-            else:
-                if not tag_key_from_action:
-                    message = "Warning: Action 'remove_tags': missing 'tag_service_key'. Skipping generation of implicit inclusion predicates."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-                if not tags_to_process:
-                    message = "Note: Action 'remove_tags': 'tags_to_process' is empty. No implicit inclusion predicates generated."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-
-        elif action_type == 'modify_rating':
-            rating_key = rule_action_obj.get('rating_service_key')
-            target_val = rule_action_obj.get('rating_value')
-            info = get_service_details(rating_key)
-            if info and info.get('name'):
-                s_name = info['name']; s_type = info['type']; s_max_stars = info.get('max_stars')
-                action_exclusion_preds = []
-                if target_val is None:
-                    action_exclusion_preds.append(f"system:has a rating for {s_name}")
-                elif isinstance(target_val, bool):
-                    if s_type == 7:
-                        other_state_keyword = 'dislike' if target_val is True else 'like'
-                        action_exclusion_preds.append(f"system:rating for {s_name} is {other_state_keyword}")
-                        action_exclusion_preds.append(f"system:does not have a rating for {s_name}")
-                    else:
-                        message = f"Note: Action modify_rating (bool) for non-Like/Dislike service '{s_name}'. No specific exclusion."
-                        level = 'critical' if is_critical_warning(message) else 'info'
-                        translation_warnings.append({'level': level, 'message': message})
-                elif isinstance(target_val, (int, float)):
-                    num_target = int(target_val)
-                    if s_type == 6:
-                        action_exclusion_preds.append(f"system:does not have a rating for {s_name}")
-                        action_exclusion_preds.append(f"system:rating for {s_name} < {num_target}" + (f"/{s_max_stars}" if s_max_stars else ""))
-                        action_exclusion_preds.append(f"system:rating for {s_name} > {num_target}" + (f"/{s_max_stars}" if s_max_stars else ""))
-                    elif s_type == 22:
-                        action_exclusion_preds.append(f"system:does not have a rating for {s_name}")
-                        action_exclusion_preds.append(f"system:rating for {s_name} < {num_target}")
-                        action_exclusion_preds.append(f"system:rating for {s_name} > {num_target}")
-                    else:
-                        message = f"Note: Action modify_rating (num) for non-num/incdec service '{s_name}'. No specific exclusion."
-                        level = 'critical' if is_critical_warning(message) else 'info'
-                        translation_warnings.append({'level': level, 'message': message})
-
-                if action_exclusion_preds:
-                    if target_val is None:
-                        # For "set to no rating", we only want files that HAVE a rating.
-                        string_predicates.append(f"system:has a rating for {s_name}")
-                    else:
-                        # For setting a specific value, we want an OR group of all other states.
-                        string_predicates.append(action_exclusion_preds)
-                elif not any("No specific exclusion" in w['message'] for w in translation_warnings if f"'{s_name}'" in w['message']) and target_val is not None:
-                    message = f"Note: Action modify_rating for '{s_name}' to '{target_val}': No specific search exclusion predicates added. Relying on post-search override logic or Hydrus idempotency."
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
-            elif rating_key:
-                 message = f"Warning: Action modify_rating: service key '{rating_key}' not found for exclusion. Skipping specific search exclusion predicates."
-                 level = 'critical' if is_critical_warning(message) else 'info'
-                 translation_warnings.append({'level': level, 'message': message})
+    action_type = rule_action_obj.get('type') if isinstance(rule_action_obj, dict) else None
+    action_handler = _ACTION_PREDICATE_HANDLERS.get(action_type) if isinstance(action_type, str) else None
+    if action_handler:
+        action_handler(rule_action_obj, services_by_key, local_services, force_in_special_check,
+                       string_predicates, translation_warnings, warning_fingerprints)
 
     # After all predicates have been added, add a note if any were implicitly generated by an action
-    action_type = rule_action_obj.get('type')
-    if action_type in ['add_to', 'force_in', 'add_tags', 'remove_tags', 'modify_rating']:
-        note_text = f"Note: Action '{action_type}' generated implicit predicates. Final search query: {string_predicates}"
-        if not any(note_text in w['message'] for w in translation_warnings):
-             level = 'critical' if is_critical_warning(note_text) else 'info'
-             translation_warnings.append({'level': level, 'message': note_text})
+    # (every action type with a predicate handler does)
+    if action_handler:
+        note_fingerprint = ('implicit_predicates_note', action_type)
+        if note_fingerprint not in warning_fingerprints:
+            warning_fingerprints.add(note_fingerprint)
+            note_text = f"Note: Action '{action_type}' generated implicit predicates. Final search query: {string_predicates}"
+            _emit(translation_warnings, note_text)
     if limit_predicate_to_add:
         string_predicates.append(limit_predicate_to_add)
 
     if not string_predicates:
-        has_substantive_user_conditions = False
-        if rule_conditions_list:
-            for c in rule_conditions_list:
-                if isinstance(c, dict):
-                    c_type = c.get('type')
-                    if c_type == 'paste_search':
-                        paste_val = c.get('value', '').strip()
-                        if paste_val and not all(line.strip().startswith('#') or not line.strip() for line in paste_val.split('\n')):
-                            has_substantive_user_conditions = True; break
-                    elif c_type == 'or_group':
-                        if c.get('conditions'): has_substantive_user_conditions = True; break
-                    elif c_type and c_type != 'limit':
-                        has_substantive_user_conditions = True; break
+        has_substantive_user_conditions = saw_substantive_condition
 
         is_critical_empty_search = False
         reason_for_critical = ""
@@ -777,15 +939,26 @@ def translate_rule_to_hydrus_predicates(
                        f"This rule would match ALL files. Reason: {reason_for_critical} "
                        f"Aborting rule.")
 
-            current_critical_warnings = [w['message'] for w in translation_warnings if w['level'] == 'critical']
-            if not any( ("yielded no search terms" in c_w or "yielded no usable predicates" in c_w or "target all files" in c_w) for c_w in current_critical_warnings):
-                if not any(message.split(":",1)[1].strip() == c_w.split(":",1)[1].strip() for c_w in current_critical_warnings):
-                    level = 'critical' if is_critical_warning(message) else 'info'
-                    translation_warnings.append({'level': level, 'message': message})
+            # One pass over the critical warnings: stop at the first one that already reports an
+            # empty search, otherwise collect their reasons (text after the first colon) for dedupe.
+            already_reported = False
+            critical_reasons_seen = set()
+            for w in translation_warnings:
+                if w['level'] != 'critical':
+                    continue
+                c_w = w['message']
+                if "yielded no search terms" in c_w or "yielded no usable predicates" in c_w or "target all files" in c_w:
+                    already_reported = True
+                    break
+                critical_reasons_seen.add(c_w.split(":", 1)[-1].strip())
+            if not already_reported and message.split(":", 1)[1].strip() not in critical_reasons_seen:
+                _emit(translation_warnings, message)
 
         elif not translation_warnings:
              message = f"Note: No Hydrus search predicates were generated from rule conditions or action logic. Rule may not find files as expected or may not be effective."
-             level = 'critical' if is_critical_warning(message) else 'info'
-             translation_warnings.append({'level': level, 'message': message})
+             _emit(translation_warnings, message)
+
+    if PROFILE_CONDITION_TYPES:
+        logger.debug(f"Condition type counts (all translations so far): {condition_type_counts.most_common()}")
 
     return string_predicates, translation_warnings
\ No newline at end of file
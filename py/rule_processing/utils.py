@@ -7,11 +7,35 @@ parsing, and object creation that are used across different modules
 of the rule processing logic.
 """
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from urllib.parse import unquote
 
 logger = logging.getLogger(__name__)
 
+# Relative time frames accepted by the logs API, as offsets back from now.
+TIME_FRAME_DELTAS = {
+    '24h': timedelta(hours=24),
+    '3d': timedelta(days=3),
+    '1w': timedelta(weeks=1),
+    '1m': timedelta(days=30),  # Approx 1 month
+    '6m': timedelta(days=180),  # Approx 6 months
+    '1y': timedelta(days=365),  # Approx 1 year
+}
+
+# Start bound reported for the 'all' time frame; callers compare against it to skip the filter.
+MIN_ISO_Z = datetime.min.isoformat() + "Z"
+
+
+def rule_id_set(values):
+    """
+    Turns a rule ID list from a request payload (e.g. 'override_bypass_list') into a frozenset
+    for O(1) membership checks, ignoring anything that isn't a string.
+    """
+    if not isinstance(values, (list, tuple, set, frozenset)):
+        return frozenset()
+    return frozenset(value for value in values if isinstance(value, str))
+
 
 def get_rule_by_id(rule_id_to_find, rules_list):
     """Finds a rule dictionary from a list by its ID."""
@@ -43,54 +67,30 @@ def parse_time_range_for_logs(args):
     start_date_str = args.get('start_date')
     end_date_str = args.get('end_date')
 
-    now = datetime.utcnow()
+    now = datetime.now(timezone.utc)
     end_dt = now  # Default end is now
     time_frame_used_for_response = time_frame  # Store the initial or determined time_frame label
+    start_iso = end_iso = None  # Set directly for custom ranges
 
     if start_date_str:  # Custom date range takes precedence
         try:
-            # Handle URL encoded '+' for timezone, or 'Z'
-            start_date_str_decoded = unquote(start_date_str)
-            if 'T' in start_date_str_decoded:  # Full ISO string likely
-                start_dt = datetime.fromisoformat(start_date_str_decoded.replace('Z', '+00:00'))
-            else:  # Assume YYYY-MM-DD, set to start of day UTC
-                start_dt = datetime.strptime(start_date_str_decoded, '%Y-%m-%d').replace(hour=0, minute=0, second=0, microsecond=0)
-
+            start_iso = _custom_date_bound_iso(start_date_str, end_of_day=False)
             if end_date_str:
-                end_date_str_decoded = unquote(end_date_str)
-                if 'T' in end_date_str_decoded:  # Full ISO string likely
-                    end_dt = datetime.fromisoformat(end_date_str_decoded.replace('Z', '+00:00'))
-                else:  # Assume YYYY-MM-DD, set to end of day UTC
-                    end_dt = datetime.strptime(end_date_str_decoded, '%Y-%m-%d').replace(hour=23, minute=59, second=59, microsecond=999999)
-            else:  # If start_date is given but no end_date, end_date is now
-                end_dt = now  # Which is already set
+                end_iso = _custom_date_bound_iso(end_date_str, end_of_day=True)
+            # If start_date is given but no end_date, end_date is now (end_dt is already set)
             time_frame_used_for_response = "custom"
         except ValueError:
             logger.warning(f"Invalid custom date format. Falling back to default time_frame '{time_frame}'. Dates: {start_date_str}, {end_date_str}")
             # Fallback to default time_frame if parsing fails
             time_frame = '1w'  # Reset to default '1w' or some other sensible default
+            start_iso = end_iso = None
             start_dt = now - timedelta(weeks=1)
             end_dt = now
             time_frame_used_for_response = time_frame  # Update to actual used frame
 
-    elif time_frame == '24h':
-        start_dt = now - timedelta(hours=24)
-        time_frame_used_for_response = "24h"
-    elif time_frame == '3d':
-        start_dt = now - timedelta(days=3)
-        time_frame_used_for_response = "3d"
-    elif time_frame == '1w':
-        start_dt = now - timedelta(weeks=1)
-        time_frame_used_for_response = "1w"
-    elif time_frame == '1m':
-        start_dt = now - timedelta(days=30)  # Approx 1 month
-        time_frame_used_for_response = "1m"
-    elif time_frame == '6m':
-        start_dt = now - timedelta(days=180)  # Approx 6 months
-        time_frame_used_for_response = "6m"
-    elif time_frame == '1y':
-        start_dt = now - timedelta(days=365)  # Approx 1 year
-        time_frame_used_for_response = "1y"
+    elif time_frame in TIME_FRAME_DELTAS:
+        start_dt = now - TIME_FRAME_DELTAS[time_frame]
+        time_frame_used_for_response = time_frame
     elif time_frame == 'all':
         start_dt = datetime.min  # Represents earliest possible time
         time_frame_used_for_response = "all"
@@ -101,7 +101,38 @@ def parse_time_range_for_logs(args):
 
     # Convert to ISO strings suitable for SQLite TEXT comparison (assuming stored as UTC 'Z' format)
     # For 'all' time, datetime.min is used.
-    start_iso = start_dt.isoformat() + "Z" if time_frame_used_for_response != 'all' else (datetime.min.isoformat() + "Z")
-    end_iso = end_dt.isoformat() + "Z"  # end_dt is always a specific datetime
+    if start_iso is None:
+        start_iso = _to_utc_iso_z(start_dt) if time_frame_used_for_response != 'all' else MIN_ISO_Z
+    if end_iso is None:
+        end_iso = _to_utc_iso_z(end_dt)  # end_dt is always a specific datetime
 
-    return start_iso, end_iso, time_frame_used_for_response
\ No newline at end of file
+    return start_iso, end_iso, time_frame_used_for_response
+
+
+@lru_cache(maxsize=1024)
+def _custom_date_bound_iso(date_str, end_of_day):
+    """
+    Converts a custom start/end date from the logs API into the stored ISO form.
+    Unlike the relative time frames these don't depend on the current time, and the logs
+    page sends the same ones on every refresh, so results are cached. Raises ValueError
+    for unparseable dates.
+    """
+    # Handle URL encoded '+' for timezone, or 'Z'
+    date_str_decoded = unquote(date_str)
+    if 'T' in date_str_decoded:  # Full ISO string likely
+        dt = datetime.fromisoformat(date_str_decoded.replace('Z', '+00:00'))
+    elif end_of_day:  # Assume YYYY-MM-DD, set to end of day UTC
+        dt = datetime.strptime(date_str_decoded, '%Y-%m-%d').replace(hour=23, minute=59, second=59, microsecond=999999, tzinfo=timezone.utc)
+    else:  # Assume YYYY-MM-DD, set to start of day UTC
+        dt = datetime.strptime(date_str_decoded, '%Y-%m-%d').replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=timezone.utc)
+    return _to_utc_iso_z(dt)
+
+
+def _to_utc_iso_z(dt):
+    """
+    Formats a datetime the way run logs store timestamps: naive UTC ISO 8601 plus 'Z'.
+    Aware datetimes are converted to UTC first; naive ones are taken to be UTC already.
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat() + "Z"
\ No newline at end of file
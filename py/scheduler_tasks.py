@@ -1,60 +1,84 @@
 import logging
-from datetime import datetime, timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import uuid  # For run_id
 import os
 
+from apscheduler.jobstores.base import JobLookupError
 from flask_apscheduler import APScheduler
 from rule_processing.orchestrator import execute_single_rule
-from database import get_all_set_data, get_db_connection, mark_rule_as_run, get_rules_first_run_status, prune_duplicate_logs, get_app_state, set_app_state, get_last_run_timestamp_for_rule
+from database import get_all_set_data, acquire_connection, release_connection, pooled_connection, mark_rule_as_run, get_rules_first_run_status, prune_duplicate_logs, get_app_states, set_app_states, get_last_run_timestamps_for_rules, get_custom_interval_flags
 from app_config import load_rules as app_config_load_rule
 
 logger = logging.getLogger(__name__)
 scheduler = APScheduler()
 
+RULES_TICK_JOB_ID = 'rules_tick_job'
+TICK_INTERVAL_SECONDS = 10  # A fixed, short interval for checking.
+# After this many consecutive ticks with no due rules, check less often until a rule is due again.
+IDLE_TICKS_BEFORE_BACKOFF = 2
+IDLE_TICK_INTERVAL_SECONDS = 30
+
+@lru_cache(maxsize=4096)
+def _parse_last_run_iso(last_run_iso: str) -> datetime:
+    """
+    Parses a stored 'YYYY-MM-DDTHH:MM:SS[.ffffff]Z' timestamp into an aware UTC datetime.
+    Values without an offset are taken to be UTC. Cached because the tick job re-parses
+    the same last-run timestamps every 10 seconds until the rule or set runs again.
+    """
+    last_run_dt = datetime.fromisoformat(last_run_iso.replace('Z', '+00:00'))
+    if last_run_dt.tzinfo is None:
+        last_run_dt = last_run_dt.replace(tzinfo=timezone.utc)
+    return last_run_dt
+
 def _should_perform_deep_run(db_conn, rule):
     """
     Determines if a 'force_in' rule should perform its special deep check based on its configuration.
-    This function has NO side effects.
+    This function has NO side effects other than logging the decision.
     """
     rule_id = rule['id']
-    rule_name = rule.get('name', rule_id)
-    
     frequency = rule.get('force_in_check_frequency', 'first_run_only')
+    interval = rule.get('force_in_check_interval_runs')
+    # Only str frequencies and int intervals affect the decision; anything else is passed
+    # in as text so the cache key is hashable and the logged value reads the same.
+    perform_deep_run, log_level, reason = _deep_run_decision(
+        frequency if isinstance(frequency, str) else None,
+        interval if isinstance(interval, int) or interval is None else str(interval),
+        rule.get('run_count', 0)
+    )
+    if logger.isEnabledFor(log_level):
+        logger.log(log_level, f"Deep run for '{rule.get('name', rule_id)}': {reason}")
+    return perform_deep_run
 
+@lru_cache(maxsize=1024)
+def _deep_run_decision(frequency, interval, run_count):
+    """
+    The pure part of _should_perform_deep_run(), cached on its inputs.
+    Returns a tuple of (perform_deep_run, log_level, reason).
+    """
     if frequency == 'always':
-        logger.info(f"Deep run for '{rule_name}': Frequency is 'always'. Performing deep run.")
-        return True
-    
+        return True, logging.INFO, "Frequency is 'always'. Performing deep run."
+
     if frequency == 'never':
-        logger.info(f"Deep run for '{rule_name}': Frequency is 'never'. Skipping deep run.")
-        return False
+        return False, logging.INFO, "Frequency is 'never'. Skipping deep run."
 
     if frequency == 'every_x_runs':
-        interval = rule.get('force_in_check_interval_runs')
-        run_count = rule.get('run_count', 0)
-        
         if not isinstance(interval, int) or interval <= 0:
-            logger.warning(f"Deep run for '{rule_name}': Mode is 'every_x_runs' but interval is invalid ({interval}). Skipping deep run.")
-            return False
-        
+            return False, logging.WARNING, f"Mode is 'every_x_runs' but interval is invalid ({interval}). Skipping deep run."
+
         # We check if the *next* run (current run_count + 1) is a multiple of the interval.
         # This makes the logic intuitive: if interval is 5, it runs on the 5th, 10th, 15th... execution.
         # A run_count of 4 means the next run is the 5th.
         if (run_count + 1) % interval == 0:
-            logger.info(f"Deep run for '{rule_name}': Mode is 'every {interval} runs' and current run count is {run_count}. Performing deep run for execution #{run_count + 1}.")
-            return True
-        else:
-            logger.info(f"Deep run for '{rule_name}': Mode is 'every {interval} runs', current run count is {run_count}. Not due for deep run.")
-            return False
+            return True, logging.INFO, f"Mode is 'every {interval} runs' and current run count is {run_count}. Performing deep run for execution #{run_count + 1}."
+        return False, logging.INFO, f"Mode is 'every {interval} runs', current run count is {run_count}. Not due for deep run."
 
     # Default case: frequency == 'first_run_only'
-    run_count = rule.get('run_count', 0)
     if run_count == 0:
-        logger.info(f"Deep run for '{rule_name}': Frequency is 'first_run_only' and rule has a run_count of 0. Performing deep run.")
-        return True
-    
-    logger.info(f"Deep run for '{rule_name}': Frequency is 'first_run_only' but rule has already run (run_count > 0). Skipping deep run.")
-    return False
+        return True, logging.INFO, "Frequency is 'first_run_only' and rule has a run_count of 0. Performing deep run."
+
+    return False, logging.INFO, "Frequency is 'first_run_only' but rule has already run (run_count > 0). Skipping deep run."
 
 def run_log_pruning_job(app):
     """
@@ -62,11 +86,10 @@ def run_log_pruning_job(app):
     """
     with app.app_context():
         logger.info("--- Log Pruning Job: Starting daily check ---")
-        db_conn = None
         try:
-            db_conn = get_db_connection()
-            # The prune_duplicate_logs function handles its own logging and commit/rollback.
-            deleted_count = prune_duplicate_logs(db_conn)
+            with pooled_connection() as db_conn:
+                # The prune_duplicate_logs function handles its own logging and commit/rollback.
+                deleted_count = prune_duplicate_logs(db_conn)
             if deleted_count > 0:
                 logger.info(f"Log Pruning Job: Successfully pruned {deleted_count} log entries.")
             elif deleted_count == 0:
@@ -76,8 +99,6 @@ def run_log_pruning_job(app):
         except Exception as e:
             logger.error(f"Log Pruning Job: Unhandled exception during execution: {e}", exc_info=True)
         finally:
-            if db_conn:
-                db_conn.close()
             logger.info("--- Log Pruning Job: Finished ---")
 
 
@@ -91,10 +112,6 @@ def schedule_log_pruning_job(app):
     job_id = 'log_pruning_job'
 
     global scheduler
-    if scheduler.get_job(job_id):
-        logger.info(f"Scheduler: Removing existing job '{job_id}'.")
-        scheduler.remove_job(job_id)
-
     if pruning_enabled:
         logger.info(f"Scheduler: Scheduling job '{job_id}' to run daily at 03:00 local time.")
         scheduler.add_job(
@@ -105,10 +122,21 @@ def schedule_log_pruning_job(app):
             hour=3,
             minute=0,
             replace_existing=True,
-            misfire_grace_time=3600  # Allow job to run up to 1 hour late
+            misfire_grace_time=3600,  # Allow job to run up to 1 hour late
+            coalesce=True,
+            max_instances=1
         )
     else:
         logger.info(f"Scheduler: Log pruning is disabled. Job '{job_id}' will not be scheduled.")
+        _remove_job_if_scheduled(job_id)
+
+def _remove_job_if_scheduled(job_id):
+    """Removes a scheduled job; a job that isn't scheduled is not an error."""
+    try:
+        scheduler.remove_job(job_id)
+        logger.info(f"Scheduler: Removed existing job '{job_id}'.")
+    except JobLookupError:
+        pass
 
 def run_rules_tick_job(app):
     """
@@ -120,15 +148,26 @@ def run_rules_tick_job(app):
     A rule is triggered if *any* of its applicable schedules are due.
     """
     with app.app_context():
-        tick_start_time = datetime.utcnow()
-        logger.debug(f"--- Scheduler Tick at {tick_start_time.strftime('%Y-%m-%d %H:%M:%S UTC')} ---")
+        tick_start_time = datetime.now(timezone.utc)
+        # The tick runs every few seconds; lazy %-style logging keeps filtered-out
+        # messages in this function from being formatted at all.
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("--- Scheduler Tick at %s ---", tick_start_time.strftime('%Y-%m-%d %H:%M:%S UTC'))
+
+        current_settings = app.config['HYDRUS_SETTINGS']
+        global_interval = current_settings.get('rule_interval_seconds', 0)
+
+        # Flags cached by schedule_rules_tick_job(); with no schedule of any kind there is
+        # nothing to check, so don't touch the database at all.
+        has_custom_rule_interval, has_custom_set_interval = app.config.get('HAS_CUSTOM_INTERVALS', (True, True))
+        if global_interval <= 0 and not has_custom_rule_interval and not has_custom_set_interval:
+            logger.debug("No global or custom intervals are configured. Skipping tick processing.")
+            return
 
         db_conn = None
+        had_due_rules = False
         try:
-            db_conn = get_db_connection()
-            current_settings = app.config['HYDRUS_SETTINGS']
-            global_interval = current_settings.get('rule_interval_seconds', 0)
-            
+            db_conn = acquire_connection()
             all_rules = app_config_load_rule(db_conn)
             set_data = get_all_set_data(db_conn)
 
@@ -143,64 +182,72 @@ def run_rules_tick_job(app):
                 if not last_run_iso: return True
                 if not isinstance(interval_sec, int) or interval_sec <= 0: return False
                 try:
-                    last_run_dt = datetime.fromisoformat(str(last_run_iso).replace('Z', ''))
+                    last_run_dt = _parse_last_run_iso(str(last_run_iso))
                     return current_time >= last_run_dt + timedelta(seconds=interval_sec)
                 except (ValueError, TypeError):
-                    logger.warning(f"Could not parse last_run_iso '{last_run_iso}'. Scheduling to run now.")
+                    logger.warning("Could not parse last_run_iso '%s'. Scheduling to run now.", last_run_iso)
                     return True
 
-            custom_timed_set_ids = {
+            custom_timed_set_ids = frozenset(
                 s['id'] for s in set_data.get('sets', [])
                 if s.get('execution_override') == 'custom' and s.get('interval_seconds', 0) > 0
-            }
+            )
+            # Index the rule/set associations once so each set's members are a dict lookup.
+            rule_ids_by_set = defaultdict(list)
+            for assoc in set_data.get('associations', []):
+                rule_ids_by_set[assoc['set_id']].append(assoc['rule_id'])
             rules_governed_by_sets = {
-                assoc['rule_id'] for assoc in set_data.get('associations', [])
-                if assoc['set_id'] in custom_timed_set_ids
+                rule_id for set_id in custom_timed_set_ids for rule_id in rule_ids_by_set.get(set_id, ())
             }
 
+            # Fetch every rule's last run time and every custom set's last run state up front,
+            # one query each, instead of one query per rule/set in the loops below.
+            last_run_by_rule = get_last_run_timestamps_for_rules(db_conn, [rule['id'] for rule in all_rules])
+            last_set_run_states = get_app_states(db_conn, [f"last_run_ts_set_{set_id}" for set_id in custom_timed_set_ids])
+
+            # One pass covers both per-rule schedules: a rule's own 'custom' interval, or
+            # the global interval for rules with no custom interval and no custom-timed set.
             for rule in all_rules:
                 if rule.get('execution_override') == 'custom' and rule.get('interval_seconds', 0) > 0:
-                    last_run = get_last_run_timestamp_for_rule(db_conn, rule['id'])
-                    if is_due(last_run, rule['interval_seconds'], tick_start_time):
-                        rules_to_run_ids.add(rule['id'])
+                    interval_sec = rule['interval_seconds']
+                elif global_interval > 0 and rule['id'] not in rules_governed_by_sets:
+                    interval_sec = global_interval
+                else:
+                    continue
+                if is_due(last_run_by_rule.get(rule['id']), interval_sec, tick_start_time):
+                    rules_to_run_ids.add(rule['id'])
             
             for a_set in set_data.get('sets', []):
                 if a_set['id'] in custom_timed_set_ids:
-                    last_set_run = get_app_state(db_conn, f"last_run_ts_set_{a_set['id']}")
+                    last_set_run = last_set_run_states.get(f"last_run_ts_set_{a_set['id']}")
                     if is_due(last_set_run, a_set['interval_seconds'], tick_start_time):
                         sets_triggered_this_tick.add(a_set['id'])
-                        for assoc in set_data.get('associations', []):
-                            if assoc['set_id'] == a_set['id']:
-                                rules_to_run_ids.add(assoc['rule_id'])
-            
-            if global_interval > 0:
-                for rule in all_rules:
-                    is_custom_rule = rule.get('execution_override') == 'custom' and rule.get('interval_seconds', 0) > 0
-                    is_in_custom_set = rule['id'] in rules_governed_by_sets
-                    if not is_custom_rule and not is_in_custom_set:
-                        last_run = get_last_run_timestamp_for_rule(db_conn, rule['id'])
-                        if is_due(last_run, global_interval, tick_start_time):
-                            rules_to_run_ids.add(rule['id'])
+                        rules_to_run_ids.update(rule_ids_by_set.get(a_set['id'], ()))
 
+
+            # Filter all_rules (rather than collecting rule dicts as they become due) to keep
+            # the priority order that override resolution depends on.
             rules_to_run_this_tick = [rule for rule in all_rules if rule['id'] in rules_to_run_ids]
 
             if not rules_to_run_this_tick:
                 logger.debug("Tick finished. No rules were due to run.")
                 return
 
-            logger.info(f"Scheduler Tick: {len(rules_to_run_this_tick)} unique rule(s) are due for execution.")
+            had_due_rules = True
+            logger.info("Scheduler Tick: %d unique rule(s) are due for execution.", len(rules_to_run_this_tick))
             
-            parent_run_id = f"scheduled_tick_{uuid.uuid4()}"
+            parent_run_id = f"scheduled_tick_{uuid.uuid4().hex}"
 
-            # Note: A separate connection is used for each rule execution to ensure isolation
+            # Note: A separate (pooled) connection is used for each rule execution to ensure isolation
             # and prevent a single failure from halting the entire tick.
             for i, rule in enumerate(rules_to_run_this_tick):
                 rule_db_conn = None
                 try:
                     rule_name_log = rule.get('name', rule.get('id', 'Unnamed'))
-                    logger.info(f"\nScheduler (Parent Run {parent_run_id[:8]}): Executing Due Rule {i+1}/{len(rules_to_run_this_tick)}: '{rule_name_log}'")
+                    logger.info("\nScheduler (Parent Run %s): Executing Due Rule %d/%d: '%s'",
+                                parent_run_id[:8], i + 1, len(rules_to_run_this_tick), rule_name_log)
                     
-                    rule_db_conn = get_db_connection()
+                    rule_db_conn = acquire_connection()
                     is_force_in_rule = rule.get('action', {}).get('type') == 'force_in'
                     force_in_special_check = False
 
@@ -220,21 +267,49 @@ def run_rules_tick_job(app):
                     logger.error(f"Scheduler-level unhandled error during execution of rule '{rule.get('name')}': {e}", exc_info=True)
                 finally:
                     if rule_db_conn:
-                        rule_db_conn.close()
+                        release_connection(rule_db_conn)
             
             # --- Update state in the database at the end ---
-            for set_id in sets_triggered_this_tick:
-                set_app_state(db_conn, f"last_run_ts_set_{set_id}", tick_start_time.isoformat() + "Z")
+            # Stored in the same naive-UTC-plus-'Z' form as run_logs, which are compared as text.
+            tick_start_iso = tick_start_time.replace(tzinfo=None).isoformat() + "Z"
+            set_app_states(db_conn, [(f"last_run_ts_set_{set_id}", tick_start_iso) for set_id in sets_triggered_this_tick])
             
             db_conn.commit()
-            logger.info(f"--- Scheduler Tick (Parent Run {parent_run_id[:8]}) Finished ---")
+            logger.info("--- Scheduler Tick (Parent Run %s) Finished ---", parent_run_id[:8])
 
         except Exception as e:
             logger.error(f"Scheduler tick job failed: {e}", exc_info=True)
             if db_conn: db_conn.rollback()
         finally:
             if db_conn:
-                db_conn.close()
+                release_connection(db_conn)
+            _adjust_tick_interval(app, had_due_rules)
+
+
+def _adjust_tick_interval(app, had_due_rules):
+    """
+    Backs the tick job off to IDLE_TICK_INTERVAL_SECONDS after IDLE_TICKS_BEFORE_BACKOFF
+    consecutive idle ticks, and returns it to TICK_INTERVAL_SECONDS once a rule is due.
+    """
+    idle_streak = 0 if had_due_rules else app.config.get('TICK_IDLE_STREAK', 0) + 1
+    app.config['TICK_IDLE_STREAK'] = idle_streak
+
+    if had_due_rules:
+        target_seconds = TICK_INTERVAL_SECONDS
+    elif idle_streak >= IDLE_TICKS_BEFORE_BACKOFF:
+        target_seconds = IDLE_TICK_INTERVAL_SECONDS
+    else:
+        return
+    if app.config.get('TICK_INTERVAL_SECONDS', TICK_INTERVAL_SECONDS) == target_seconds:
+        return
+
+    try:
+        scheduler.modify_job(RULES_TICK_JOB_ID, trigger='interval', seconds=target_seconds)
+        app.config['TICK_INTERVAL_SECONDS'] = target_seconds
+        logger.info(f"Scheduler: Tick job now runs every {target_seconds} seconds ({'rules are due' if had_due_rules else f'{idle_streak} idle ticks'}).")
+    except Exception as e:
+        # The job may have been removed by a concurrent reschedule; the next schedule call resets it.
+        logger.warning(f"Scheduler: Could not change the tick job interval to {target_seconds} seconds: {e}")
 
 
 def schedule_rules_tick_job(app):
@@ -245,30 +320,20 @@ def schedule_rules_tick_job(app):
     settings = app.config.get('HYDRUS_SETTINGS', {})
     # The tick job should run if the global interval is set, or if ANY rule
     # or ANY set has a custom interval defined.
-    db_conn = None
-    rules = []
-    set_data = {}
-    try:
-        db_conn = get_db_connection()
-        rules = app_config_load_rule(db_conn)
-        set_data = get_all_set_data(db_conn)
-    finally:
-        if db_conn:
-            db_conn.close()
-
-    # The 'execution_override' is a simple string 'custom', not a dict.
-    has_custom_rule_interval = any(r.get('execution_override') == 'custom' for r in rules)
-    has_custom_set_interval = any(s.get('execution_override') == 'custom' for s in set_data.get('sets', []))
+    # The 'execution_override' column holds the simple string 'custom', not a dict.
+    with pooled_connection() as db_conn:
+        has_custom_rule_interval, has_custom_set_interval = get_custom_interval_flags(db_conn)
+    app.config['HAS_CUSTOM_INTERVALS'] = (has_custom_rule_interval, has_custom_set_interval)
     global_interval_enabled = settings.get('rule_interval_seconds', 0) > 0
 
-    job_id = 'rules_tick_job'
-    tick_interval_seconds = 10  # A fixed, short interval for checking.
+    job_id = RULES_TICK_JOB_ID
+    tick_interval_seconds = TICK_INTERVAL_SECONDS
     initial_delay_seconds = 30
     
     global scheduler
-    if scheduler.get_job(job_id):
-        logger.info(f"Scheduler: Removing existing job '{job_id}'.")
-        scheduler.remove_job(job_id)
+    # A freshly added job always starts at the normal interval.
+    app.config['TICK_IDLE_STREAK'] = 0
+    app.config['TICK_INTERVAL_SECONDS'] = tick_interval_seconds
 
     if global_interval_enabled or has_custom_rule_interval or has_custom_set_interval:
         first_run_time = datetime.now() + timedelta(seconds=initial_delay_seconds)
@@ -282,7 +347,10 @@ def schedule_rules_tick_job(app):
             seconds=tick_interval_seconds,
             next_run_time=first_run_time,
             replace_existing=True,
-            misfire_grace_time=30 
+            misfire_grace_time=30,
+            coalesce=True,
+            max_instances=1  # A slow tick (e.g. a slow Hydrus call) must not overlap the next one
         )
     else:
-        logger.info(f"Scheduler: Global rule interval is disabled and no rules have custom intervals. Tick job will not be scheduled.")
\ No newline at end of file
+        logger.info(f"Scheduler: Global rule interval is disabled and no rules have custom intervals. Tick job will not be scheduled.")
+        _remove_job_if_scheduled(job_id)
\ No newline at end of file
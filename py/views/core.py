@@ -1,5 +1,6 @@
 # --- Standard Library Imports ---
 import os
+import threading
 from functools import wraps
 
 # --- Third-Party Imports ---
@@ -11,27 +12,53 @@ from flask import (
 # --- Local Application Imports ---
 from . import views_bp  # <-- Import the shared blueprint
 from app_config import save_settings_to_file
-from database import get_db_connection
 from hydrus_interface import call_hydrus_api
-from rule_processing.actions import ensure_services_are_loaded
-from rule_processing.context import RuleExecutionContext
+from rule_processing.actions import load_available_services
 from scheduler_tasks import schedule_log_pruning_job, schedule_rules_tick_job
 
+_BACKGROUND_IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.webp', '.gif'})
+
 def _get_available_backgrounds():
+    """
+    Returns the images in static/images/backgrounds.
+    The directory only changes when the app is redeployed, so it is scanned on the
+    first page render and the result is kept in app.config['AVAILABLE_BACKGROUNDS'].
+    """
+    cached = current_app.config.get('AVAILABLE_BACKGROUNDS')
+    if cached is None:
+        cached = current_app.config['AVAILABLE_BACKGROUNDS'] = _scan_backgrounds_dir()
+    return cached
+
+def _scan_backgrounds_dir():
     """Scans the static/images/backgrounds directory for available images."""
     backgrounds_dir = os.path.join(current_app.static_folder, 'images', 'backgrounds')
     if not os.path.isdir(backgrounds_dir):
         return []
     try:
-        # List files, filter for common image extensions, and return the list
-        supported_extensions = ('.png', '.jpg', '.jpeg', '.webp', '.gif')
-        return [f for f in os.listdir(backgrounds_dir) if f.lower().endswith(supported_extensions)]
+        # List regular files with a common image extension
+        with os.scandir(backgrounds_dir) as entries:
+            return [entry.name for entry in entries
+                    if os.path.splitext(entry.name)[1].lower() in _BACKGROUND_IMAGE_EXTENSIONS and entry.is_file()]
     except OSError:
         current_app.logger.error(f"Could not read directory: {backgrounds_dir}")
         return []
 
 # --- Decorators and Helpers ---
 
+# Encoded bodies of the services endpoints, keyed by endpoint. Each entry remembers the
+# config objects it was built from; every writer replaces AVAILABLE_SERVICES and
+# HYDRUS_CONNECTION_STATUS with new objects rather than mutating them, so an identity
+# match means the cached bytes are still current.
+_encoded_payload_cache = {}
+
+def _cached_json_response(cache_key, sources, build_payload):
+    """Returns a JSON response for build_payload(), re-encoding only when one of `sources` was replaced."""
+    cached = _encoded_payload_cache.get(cache_key)
+    if cached is None or any(old is not new for old, new in zip(cached[0], sources)):
+        cached = (sources, current_app.json.response(build_payload()).get_data())
+        _encoded_payload_cache[cache_key] = cached
+    return current_app.response_class(cached[1], mimetype=current_app.json.mimetype)
+
 def hydrus_online_required(f):
     """
     A decorator to protect routes that require a live connection to Hydrus.
@@ -88,33 +115,29 @@ def _retry_connection_logic():
         current_app.config['HYDRUS_CONNECTION_STATUS'] = {'status': 'OFFLINE', 'message': f'Failed to connect: {e}'}
         current_app.config['AVAILABLE_SERVICES'] = []
 
-def _fetch_available_services_helper(config, log_reason=""):
+def _fetch_available_services_helper(config, log_reason="", use_cache=True):
     """
-    Creates a minimal context to fetch services, as ensure_services_are_loaded
-    now expects a RuleExecutionContext object.
+    Fetches services outside of a rule execution, resolving the API settings the
+    same way RuleExecutionContext does.
     """
-    db_conn = None
+    settings = config.get('HYDRUS_SETTINGS', {})
     try:
-        db_conn = get_db_connection()
-        dummy_ctx = RuleExecutionContext(
-            app_config=config, db_conn=db_conn,
-            rule={'id': 'dummy', 'name': 'dummy_rule_for_service_fetch'},
-            run_id='dummy_run', rule_execution_id='dummy_exec', is_manual_run=False
+        return load_available_services(
+            config,
+            settings.get('hydrus_api_url') or settings.get('api_address'),
+            settings.get('hydrus_api_key') or settings.get('api_key'),
+            f"Services fetch ({log_reason})",
+            use_cache=use_cache
         )
-        return ensure_services_are_loaded(dummy_ctx)
     except Exception as e:
-        current_app.logger.error(f"Failed to create context or fetch services ({log_reason}): {e}")
+        current_app.logger.error(f"Failed to fetch services ({log_reason}): {e}")
         return []
-    finally:
-        if db_conn: db_conn.close()
 
 # --- Route Handlers ---
 
 @views_bp.route('/')
 def index():
     current_settings = current_app.config.get('HYDRUS_SETTINGS', {})
-    # Note: In a real app, this list might be cached in app.config at startup
-    # for better performance, rather than scanning the directory on every request.
     available_backgrounds = _get_available_backgrounds()
     return render_template('index.html',
                            current_theme=current_settings.get('theme', 'default'),
@@ -168,7 +191,7 @@ def handle_save_settings():
         fetch_message = ""
         if saved_settings_dict.get('hydrus_api_url'):
             current_app.logger.info("Attempting to fetch services with new settings...")
-            services_list = _fetch_available_services_helper(current_app.config, "SaveSettings")
+            services_list = _fetch_available_services_helper(current_app.config, "SaveSettings", use_cache=False)
             if services_list:
                  fetch_message = f"Successfully fetched {len(services_list)} services from Hydrus."
                  current_app.logger.info(fetch_message)
@@ -192,7 +215,8 @@ def handle_save_settings():
 @hydrus_online_required
 def get_all_services_route():
     services_list = current_app.config.get('AVAILABLE_SERVICES', [])
-    return jsonify({"success": True, "services": services_list}), 200
+    return _cached_json_response('services', (services_list,),
+                                 lambda: {"success": True, "services": services_list}), 200
 
 @views_bp.route('/get_client_settings', methods=['GET'])
 def get_client_settings_route():
@@ -224,16 +248,28 @@ def static_files_route(filename):
 def get_hydrus_status():
     status = current_app.config.get('HYDRUS_CONNECTION_STATUS', {})
     services = current_app.config.get('AVAILABLE_SERVICES', [])
-    return jsonify({
+    return _cached_json_response('status', (status, services), lambda: {
         "success": True,
         "connection": status,
         "services": services
     })
 
+# Held while a manual connection retry is talking to Hydrus.
+_connection_retry_lock = threading.Lock()
+
 @views_bp.route('/api/v1/connect', methods=['POST'])
 def retry_hydrus_connection():
     current_app.logger.info("Manual Hydrus connection attempt triggered via API.")
-    _retry_connection_logic()
+    if _connection_retry_lock.acquire(blocking=False):
+        try:
+            _retry_connection_logic()
+        finally:
+            _connection_retry_lock.release()
+    else:
+        # Another request is already retrying; wait for its result instead of calling Hydrus again.
+        current_app.logger.info("A connection attempt is already in progress; waiting for its result.")
+        with _connection_retry_lock:
+            pass
     return get_hydrus_status()
     
     
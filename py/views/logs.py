@@ -1,17 +1,127 @@
 # --- Standard Library Imports ---
 import json
-import sqlite3
-import uuid
-from datetime import datetime
-from urllib.parse import unquote
 
 # --- Third-Party Imports ---
-from flask import current_app, jsonify, render_template, request
+from flask import Response, current_app, jsonify, render_template, request, stream_with_context
+
+try:
+    import orjson # Optional: decodes the stored JSON columns faster
+except ImportError:
+    orjson = None
 
 # --- Local Application Imports ---
 from . import views_bp
 from database import get_db_connection, prune_duplicate_logs
-from rule_processing.utils import parse_time_range_for_logs
+from rule_processing.utils import MIN_ISO_Z, parse_time_range_for_logs
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so existing handlers cover both.
+_json_loads = orjson.loads if orjson else json.loads
+
+# run_logs columns the log browser renders; end_time and execution_order aren't shown.
+_SEARCH_RUNS_COLUMNS = (
+    "run_log_id, parent_run_id, rule_id, rule_name, start_time, status, matched_search_count, "
+    "eligible_for_action_count, actions_succeeded_count, actions_failed_count, summary_message, details_json"
+)
+
+_SEARCH_RUNS_SORT_MAP = {
+    'timestamp_desc': 'start_time DESC, run_log_id DESC', 'timestamp_asc': 'start_time ASC, run_log_id ASC',
+    'rule_name_asc': 'rule_name ASC', 'rule_name_desc': 'rule_name DESC',
+    'status_asc': 'status ASC', 'status_desc': 'status DESC'
+}
+
+def _build_search_runs_queries(sort_by, has_start, use_keyset):
+    """Returns (count_query, data_query) for one shape of search_runs request; only the bound values vary."""
+    where_clauses = ["start_time <= ?"]
+    if has_start:
+        where_clauses.append("start_time >= ?")
+    count_query = f"SELECT COUNT(run_log_id) FROM run_logs WHERE {' AND '.join(where_clauses)}"
+    if use_keyset:
+        where_clauses.append(f"(start_time, run_log_id) {'<' if sort_by == 'timestamp_desc' else '>'} (?, ?)")
+    data_query = (f"SELECT {_SEARCH_RUNS_COLUMNS} FROM run_logs WHERE {' AND '.join(where_clauses)} "
+                  f"ORDER BY {_SEARCH_RUNS_SORT_MAP[sort_by]} LIMIT ? OFFSET ?")
+    return count_query, data_query
+
+# Every query shape, keyed by (sort_by, has_start, use_keyset), assembled once at import.
+_SEARCH_RUNS_QUERIES = {
+    (sort_by, has_start, use_keyset): _build_search_runs_queries(sort_by, has_start, use_keyset)
+    for sort_by in _SEARCH_RUNS_SORT_MAP
+    for has_start in (False, True)
+    for use_keyset in ((False, True) if sort_by.startswith('timestamp_') else (False,))
+}
+
+# Rows fetched per chunk when streaming query results.
+_STREAM_FETCH_SIZE = 100
+
+# --- Helpers ---
+
+def _decode_history_entry(row):
+    """Turns a file history row into a dict with its details_json decoded."""
+    entry = dict(row)
+    try:
+        entry['details_json'] = _json_loads(entry['details_json'])
+    except (json.JSONDecodeError, TypeError):
+        entry['details_json'] = {"error": "Failed to decode JSON from DB", "raw": entry.get('details_json')}
+    return entry
+
+def _stream_failure_tail(e):
+    """
+    Logs an error raised part-way through a streamed body and returns the bytes that
+    finish it as a failed response, so the client still receives complete JSON.
+    """
+    current_app.logger.error(f"Error while streaming JSON response: {e}", exc_info=True)
+    return b',"success":false,"message":' + orjson.dumps(f"Error while streaming results: {e}") + b'}\n'
+
+def _stream_json_rows(cursor, prefix, close, first_rows=None, row_to_obj=dict):
+    """
+    Yields prefix, then the cursor's rows as orjson-encoded JSON array items, then close
+    and the "success" field. first_rows are rows the caller already fetched from the cursor.
+    """
+    yield prefix
+    try:
+        cursor.arraysize = _STREAM_FETCH_SIZE
+        rows = first_rows if first_rows is not None else cursor.fetchmany()
+        separator = b''
+        while rows:
+            yield separator + b','.join(orjson.dumps(row_to_obj(row)) for row in rows)
+            rows, separator = cursor.fetchmany(), b','
+    except Exception as e:
+        yield close + _stream_failure_tail(e)
+        return
+    yield close + b',"success":true}\n'
+
+def _stream_run_logs(cursor, total_records, limit, is_timestamp_sort):
+    """
+    Yields the search_runs JSON body as orjson-encoded chunks straight off the cursor,
+    so the page is never held as a list of dicts.
+    """
+    yield b'{"total_records":' + orjson.dumps(total_records) + b',"logs":['
+    try:
+        row_count, last_row = 0, None
+        while True:
+            rows = cursor.fetchmany(_STREAM_FETCH_SIZE)
+            if not rows:
+                break
+            chunk = b','.join(orjson.dumps(dict(row)) for row in rows)
+            yield (b',' + chunk) if row_count else chunk
+            row_count += len(rows)
+            last_row = rows[-1]
+
+        next_cursor = None
+        if is_timestamp_sort and row_count == limit:
+            next_cursor = {"start_time": last_row['start_time'], "run_log_id": last_row['run_log_id']}
+    except Exception as e:
+        yield b'],"next_cursor":null' + _stream_failure_tail(e)
+        return
+    yield b'],"next_cursor":' + orjson.dumps(next_cursor) + b',"success":true}\n'
+
+def _streamed_json_response(stream, db_conn):
+    """
+    Wraps a body generator in a Response that closes db_conn when the response is
+    closed, whether or not the body was ever iterated.
+    """
+    response = Response(stream_with_context(stream), mimetype='application/json')
+    response.call_on_close(db_conn.close)
+    return response
 
 # --- Route Handlers ---
 
@@ -28,16 +138,19 @@ def get_log_stats_route():
     try:
         start_iso, end_iso, time_frame = parse_time_range_for_logs(request.args)
         db_conn = get_db_connection()
-        query = """
-            SELECT rule_name, SUM(actions_succeeded_count) as total_success_count
-            FROM run_logs
-            WHERE status IN ('success_completed', 'failure_critical') AND actions_succeeded_count > 0
-        """
         params = []
-        if time_frame != 'all':
-            query += " AND start_time >= ? AND start_time <= ?"
+        if time_frame == 'all':
+            # All-time totals are kept up to date by triggers on run_logs, so no scan is needed.
+            query = "SELECT rule_name, total_success_count FROM run_log_stats_by_rule ORDER BY total_success_count DESC"
+        else:
+            query = """
+                SELECT rule_name, SUM(actions_succeeded_count) as total_success_count
+                FROM run_logs
+                WHERE status IN ('success_completed', 'failure_critical') AND actions_succeeded_count > 0
+                AND start_time >= ? AND start_time <= ?
+                GROUP BY rule_name ORDER BY total_success_count DESC
+            """
             params.extend([start_iso, end_iso])
-        query += " GROUP BY rule_name ORDER BY total_success_count DESC"
         
         cursor = db_conn.cursor()
         cursor.execute(query, tuple(params))
@@ -55,33 +168,54 @@ def search_runs_route():
         offset = max(0, int(args.get('offset', 0)))
         start_iso, end_iso, _ = parse_time_range_for_logs(args)
 
-        where_clauses, params = ["start_time <= ?"], [end_iso]
-        if start_iso != (datetime.min.isoformat() + "Z"):
-            where_clauses.append("start_time >= ?")
+        params = [end_iso]
+        has_start = start_iso != MIN_ISO_Z
+        if has_start:
             params.append(start_iso)
         
         # Filtering logic (omitted for brevity, same as original)
         # ...
 
         sort_by = args.get('sort_by', 'timestamp_desc')
-        sort_map = {'timestamp_desc': 'start_time DESC', 'timestamp_asc': 'start_time ASC',
-                    'rule_name_asc': 'rule_name ASC', 'rule_name_desc': 'rule_name DESC',
-                    'status_asc': 'status ASC', 'status_desc': 'status DESC'}
-        order_by_sql = sort_map.get(sort_by, 'start_time DESC')
-        where_sql = f"WHERE {' AND '.join(where_clauses)}"
+        if sort_by not in _SEARCH_RUNS_SORT_MAP:
+            sort_by = 'timestamp_desc'
+        count_params = tuple(params)
+
+        # Optional keyset pagination for the timestamp sorts: given the last row of the
+        # previous page, seek past it via the (start_time, run_log_id) index instead of
+        # scanning and discarding `offset` rows.
+        is_timestamp_sort = sort_by.startswith('timestamp_')
+        after_start_time, after_run_log_id = args.get('after_start_time'), args.get('after_run_log_id')
+        use_keyset = bool(is_timestamp_sort and after_start_time and after_run_log_id)
+        if use_keyset:
+            params.extend([after_start_time, after_run_log_id])
+            offset = 0
+        count_query, data_query = _SEARCH_RUNS_QUERIES[(sort_by, has_start, use_keyset)]
         
         db_conn = get_db_connection()
         cursor = db_conn.cursor()
-        count_query = f"SELECT COUNT(run_log_id) FROM run_logs {where_sql}"
-        cursor.execute(count_query, tuple(params))
-        total_records = cursor.fetchone()[0]
+        # The total is what the paginated UI shows; API callers walking pages by cursor can skip it.
+        total_records = None
+        if args.get('include_total', 'true').lower() not in ('0', 'false'):
+            cursor.execute(count_query, count_params)
+            total_records = cursor.fetchone()[0]
 
-        data_query = f"SELECT * FROM run_logs {where_sql} ORDER BY {order_by_sql} LIMIT ? OFFSET ?"
         params.extend([limit, offset])
         cursor.execute(data_query, tuple(params))
+
+        if orjson:
+            # The response now owns the connection and closes it when it is closed.
+            response = _streamed_json_response(_stream_run_logs(cursor, total_records, limit, is_timestamp_sort), db_conn)
+            db_conn = None
+            return response, 200
+
         logs = [dict(row) for row in cursor.fetchall()]
 
-        return jsonify({"success": True, "logs": logs, "total_records": total_records}), 200
+        next_cursor = None
+        if is_timestamp_sort and len(logs) == limit:
+            next_cursor = {"start_time": logs[-1]['start_time'], "run_log_id": logs[-1]['run_log_id']}
+
+        return jsonify({"success": True, "logs": logs, "total_records": total_records, "next_cursor": next_cursor}), 200
     finally:
         if db_conn: db_conn.close()
 
@@ -133,7 +267,7 @@ def lookup_file_info_route(file_hash):
             for key in ['rules_in_application', 'correct_placement', 'affected_rating_services', 'rating_priority_governance']:
                 if key in state_data and isinstance(state_data[key], str):
                     try:
-                        state_data[key] = json.loads(state_data[key])
+                        state_data[key] = _json_loads(state_data[key])
                     except json.JSONDecodeError:
                         state_data[key] = {"error": "Failed to decode JSON from DB", "raw": state_data[key]}
             result['state'] = state_data
@@ -145,16 +279,20 @@ def lookup_file_info_route(file_hash):
                    r.start_time, r.rule_id, r.rule_name, r.run_log_id
             FROM logs l JOIN run_logs r ON l.run_log_id = r.run_log_id
             WHERE l.file_hash = ? ORDER BY r.start_time DESC """, (file_hash,))
-        history_rows = cursor.fetchall()
-        history = []
-        for row in history_rows:
-            entry = dict(row)
-            try:
-                entry['details_json'] = json.loads(entry['details_json'])
-            except (json.JSONDecodeError, TypeError):
-                entry['details_json'] = {"error": "Failed to decode JSON from DB", "raw": entry.get('details_json')}
-            history.append(entry)
-        result['history'] = history
+
+        if orjson:
+            # Only the first chunk is needed to tell a known hash from an unknown one; the
+            # rest of the history is streamed, and the response now owns the connection.
+            first_rows = cursor.fetchmany(_STREAM_FETCH_SIZE)
+            if not result['state'] and not first_rows:
+                return jsonify({"success": False, "message": "File hash not found in any logs or state records."}), 404
+            prefix = b'{"data":{"state":' + orjson.dumps(result['state']) + b',"history":['
+            stream = _stream_json_rows(cursor, prefix, b']}', first_rows, _decode_history_entry)
+            response = _streamed_json_response(stream, db_conn)
+            db_conn = None
+            return response, 200
+
+        result['history'] = [_decode_history_entry(row) for row in cursor.fetchall()]
         
         if not result['state'] and not result['history']:
              return jsonify({"success": False, "message": "File hash not found in any logs or state records."}), 404
@@ -172,6 +310,11 @@ def get_run_log_details_route(run_log_id):
         db_conn = get_db_connection()
         cursor = db_conn.cursor()
         cursor.execute("SELECT * FROM logs WHERE run_log_id = ? ORDER BY log_id ASC", (run_log_id,))
+        if orjson:
+            # A run can log thousands of file entries; stream them rather than building the list.
+            response = _streamed_json_response(_stream_json_rows(cursor, b'{"details":[', b']'), db_conn)
+            db_conn = None
+            return response
         details = [dict(row) for row in cursor.fetchall()]
         return jsonify({"success": True, "details": details})
     finally:
@@ -7,34 +7,68 @@ import uuid
 # --- Third-Party Imports ---
 from flask import current_app, jsonify, request, render_template
 
+try:
+    import orjson # Optional: parses rules.json faster
+except ImportError:
+    orjson = None
+
 # --- Local Application Imports ---
 from . import views_bp
 from .core import hydrus_online_required  # <-- Import the decorator
+from .sets import invalidate_set_rule_index
 from app_config import (
     RULES_FILE,
     save_rules_to_file,
     load_rules as app_config_load_rules
 )
 from database import (
-    add_rule_to_set, clear_rule_from_file_state, get_db_connection,
-    get_rules_first_run_status, save_rule
+    add_rule_to_set, clear_rule_from_file_state_bulk, get_db_connection,
+    get_rules_first_run_status, save_rule, save_rules
 )
 from rule_processing.orchestrator import estimate_rule_impact, execute_single_rule
+from rule_processing.utils import rule_id_set
 from scheduler_tasks import schedule_rules_tick_job
 
 # --- Helpers ---
 
+# Last parsed rules.json, as ((st_mtime_ns, st_size), rules). Reused while the file is unchanged.
+_rules_file_cache = (None, [])
+
+def _invalidate_rules_cache():
+    """Forgets the parsed rules.json; called after this module rewrites the file."""
+    global _rules_file_cache
+    _rules_file_cache = (None, [])
+
 def _load_rules_from_file_user_order():
-    """Loads rules from rules.json, preserving the user-defined file order."""
-    if os.path.exists(RULES_FILE):
+    """
+    Loads rules from rules.json, preserving the user-defined file order.
+    The parsed file is cached until its mtime or size changes. Callers get a new list of
+    shallow-copied rule dicts, so they can modify rules without touching the cache.
+    """
+    global _rules_file_cache
+    try:
+        stat_result = os.stat(RULES_FILE)
+    except OSError:
+        return []
+    file_signature = (stat_result.st_mtime_ns, stat_result.st_size)
+
+    cached_signature, cached_rules = _rules_file_cache
+    if cached_signature != file_signature:
         try:
-            with open(RULES_FILE, 'r') as f:
-                rules = json.load(f)
-                return rules if isinstance(rules, list) else []
+            if orjson:
+                with open(RULES_FILE, 'rb') as f:
+                    rules = orjson.loads(f.read())
+            else:
+                with open(RULES_FILE, 'r') as f:
+                    rules = json.load(f)
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError.
         except (IOError, json.JSONDecodeError) as e:
             current_app.logger.error(f"Could not read or parse {RULES_FILE} for user-order list: {e}")
             return []
-    return []
+        cached_rules = rules if isinstance(rules, list) else []
+        _rules_file_cache = (file_signature, cached_rules)
+
+    return [dict(rule) if isinstance(rule, dict) else rule for rule in cached_rules]
 
 def _get_rule_action_details(rule):
     """
@@ -86,8 +120,7 @@ def add_rule_route():
             old_type, old_destinations = _get_rule_action_details(old_rule_state)
             if old_type and old_destinations:
                 dest_list = old_destinations if isinstance(old_destinations, list) else [old_destinations]
-                for dest in dest_list:
-                    clear_rule_from_file_state(db_conn, rule_id, old_type, dest)
+                clear_rule_from_file_state_bulk(db_conn, [(rule_id, old_type, dest) for dest in dest_list])
 
             action_performed_text = 'updated'
             final_message = f"Successfully updated rule: '{data['name']}'."
@@ -97,10 +130,9 @@ def add_rule_route():
             #Auto-naming logic
             rule_name = new_rule.get('name', '').strip()
             if not rule_name:
-                # Load existing rules to determine the next available number.
-                # app_config_load_rules provides the canonical, active list of rules.
-                existing_rules_for_count = app_config_load_rules(db_conn)
-                next_rule_number = len(existing_rules_for_count) + 1
+                # Number from the rules already loaded above, counting the same entries
+                # app_config_load_rules would accept (dicts with an 'id').
+                next_rule_number = sum(1 for r in rules_list if isinstance(r, dict) and 'id' in r) + 1
                 generated_name = f"Rule #{next_rule_number}"
                 new_rule['name'] = generated_name
                 current_app.logger.info(f"Rule name was empty. Auto-generated name: '{generated_name}'.")
@@ -117,7 +149,11 @@ def add_rule_route():
             final_message = f"Successfully added new rule: '{new_rule['name']}'."
         
         db_conn.commit()
-        if save_rules_to_file(rules_list, current_app.config, db_conn):
+        if not is_update and set_ids:
+            invalidate_set_rule_index()
+        saved = save_rules_to_file(rules_list, current_app.config, db_conn)
+        _invalidate_rules_cache()
+        if saved:
             current_app.logger.info(f"Rule(s) '{data['name']}' {action_performed_text} successfully. Transaction committed.")
             return jsonify({"success": True, "message": final_message, "rule_id": data.get('id')}), 200
         else:
@@ -144,8 +180,7 @@ def delete_rule_route(rule_id):
         action_type, destinations = _get_rule_action_details(rule_to_delete)
         if action_type and destinations:
             dest_list = destinations if isinstance(destinations, list) else [destinations]
-            for dest in dest_list:
-                clear_rule_from_file_state(db_conn, rule_id, action_type, dest)
+            clear_rule_from_file_state_bulk(db_conn, [(rule_id, action_type, dest) for dest in dest_list])
         
         cursor = db_conn.cursor()
         cursor.execute("DELETE FROM rule_set_associations WHERE rule_id = ?", (rule_id,))
@@ -153,8 +188,11 @@ def delete_rule_route(rule_id):
         
         rules_after_delete = [r for r in rules_list if r.get('id') != rule_id]
         
-        if save_rules_to_file(rules_after_delete, current_app.config, db_conn):
+        saved = save_rules_to_file(rules_after_delete, current_app.config, db_conn)
+        _invalidate_rules_cache()
+        if saved:
             db_conn.commit()
+            invalidate_set_rule_index()
             rule_name_for_log = rule_to_delete.get('name', rule_id)
             current_app.logger.info(f"Rule '{rule_name_for_log}' (ID: {rule_id}) successfully deleted.")
             return jsonify({"success": True, "message": f"Successfully deleted rule: '{rule_name_for_log}'."}), 200
@@ -174,6 +212,8 @@ def get_first_run_status_route():
     rule_ids_to_check = data.get('rule_ids', [])
     if not isinstance(rule_ids_to_check, list):
         return jsonify({"success": False, "message": "Payload must contain a 'rule_ids' list."}), 400
+    # Drop duplicates (keeping order) and anything that can't be bound as a rule ID.
+    rule_ids_to_check = list(dict.fromkeys(rid for rid in rule_ids_to_check if isinstance(rid, str)))
 
     db_conn = None
     try:
@@ -207,14 +247,14 @@ def estimate_rule_impact_route(rule_id):
 @views_bp.route('/run_rule/<rule_id_from_path>', methods=['POST'])
 @hydrus_online_required
 def run_single_rule_route(rule_id_from_path):
-    parent_run_id = f"manual_single_run_{uuid.uuid4()}"
+    parent_run_id = f"manual_single_run_{uuid.uuid4().hex}"
     current_app.logger.info(f"\n--- Manual Single Rule Trigger: Run ID {parent_run_id[:8]} for Rule {rule_id_from_path[:8]} ---")
     db_conn = None
     exec_result = {}
     try:
         data = request.get_json() or {}
-        override_bypass_list = data.get('override_bypass_list', [])
-        deep_run_list = data.get('deep_run_list', [])
+        override_bypass_list = rule_id_set(data.get('override_bypass_list'))
+        deep_run_list = rule_id_set(data.get('deep_run_list'))
 
         rules = current_app.config.get('AUTOMATION_RULES', [])
         rule_to_run = next((r for r in rules if r.get('id') == rule_id_from_path), None)
@@ -241,22 +281,22 @@ def run_single_rule_route(rule_id_from_path):
 @views_bp.route('/run_all_rules_manual', methods=['POST'])
 @hydrus_online_required
 def run_all_rules_manual_route():
-    parent_run_id = f"manual_all_rules_run_{uuid.uuid4()}"
+    parent_run_id = f"manual_all_rules_run_{uuid.uuid4().hex}"
     current_app.logger.info(f"\n--- Manual 'Run All Rules' Trigger: Run ID {parent_run_id[:8]} ---")
     all_results = []
     failed_rules = 0
     db_conn = None
     try:
         data = request.get_json() or {}
-        override_bypass_list = data.get('override_bypass_list', [])
-        deep_run_list = data.get('deep_run_list', [])
+        override_bypass_list = rule_id_set(data.get('override_bypass_list'))
+        deep_run_list = rule_id_set(data.get('deep_run_list'))
         db_conn = get_db_connection()
         rules = app_config_load_rules(db_conn) 
         if not rules:
             if db_conn: db_conn.close() # Close connection early if no rules
             current_app.logger.info("--- Manual 'Run All Rules' Finished (no rules to run): Run ID {parent_run_id[:8]} ---")
             return jsonify({"success": True, "message": "No rules to run.", "results_per_rule": []}), 200
-        rules.sort(key=lambda r: r.get('priority', 0))
+        # Already in execution order (priority first) as returned by load_rules.
 
         for i, rule in enumerate(rules):
             result = execute_single_rule(
@@ -296,28 +336,37 @@ def save_rule_intervals_route():
     if not isinstance(intervals_data, list):
         return jsonify({"success": False, "message": "Payload must be a list of interval settings."}), 400
 
+    rules_map = {rule['id']: rule for rule in _load_rules_from_file_user_order() if isinstance(rule, dict) and 'id' in rule}
+    # Settings for rules that no longer exist (e.g. from a page that wasn't refreshed) are ignored.
+    known_settings = [s for s in intervals_data if isinstance(s, dict) and s.get('rule_id') in rules_map]
+    if len(known_settings) < len(intervals_data):
+        current_app.logger.warning(f"Ignoring {len(intervals_data) - len(known_settings)} interval setting(s) for unknown rule IDs.")
+    if not known_settings:
+        return jsonify({"success": True, "message": "No matching rules to update."}), 200
+
     db_conn = None
     try:
         db_conn = get_db_connection()
-        rules_map = {rule['id']: rule for rule in _load_rules_from_file_user_order()}
-        for interval_setting in intervals_data:
-            rule_id = interval_setting.get('rule_id')
-            if rule_id in rules_map:
-                rule_to_update = rules_map[rule_id]
-                override_type = interval_setting.get('type', 'default')
-                if override_type == 'custom':
-                    rule_to_update['execution_override'] = 'custom'
-                    try:
-                        rule_to_update['interval_seconds'] = int(interval_setting.get('value'))
-                    except (ValueError, TypeError, AttributeError):
-                         rule_to_update['interval_seconds'] = 0 # Default to 0 on error
-                elif override_type == 'none':
-                     rule_to_update['execution_override'] = 'none'
-                     rule_to_update['interval_seconds'] = None
-                else: # 'default' case
-                     rule_to_update['execution_override'] = None
-                     rule_to_update['interval_seconds'] = None
-                save_rule(db_conn, rule_to_update)
+        # Snapshot each updated rule as it is processed, then write them all in one batch.
+        rules_to_save = []
+        for interval_setting in known_settings:
+            rule_id = interval_setting['rule_id']
+            rule_to_update = rules_map[rule_id]
+            override_type = interval_setting.get('type', 'default')
+            if override_type == 'custom':
+                rule_to_update['execution_override'] = 'custom'
+                try:
+                    rule_to_update['interval_seconds'] = int(interval_setting.get('value'))
+                except (ValueError, TypeError, AttributeError):
+                     rule_to_update['interval_seconds'] = 0 # Default to 0 on error
+            elif override_type == 'none':
+                 rule_to_update['execution_override'] = 'none'
+                 rule_to_update['interval_seconds'] = None
+            else: # 'default' case
+                 rule_to_update['execution_override'] = None
+                 rule_to_update['interval_seconds'] = None
+            rules_to_save.append(dict(rule_to_update))
+        save_rules(db_conn, rules_to_save)
         db_conn.commit()
         schedule_rules_tick_job(current_app._get_current_object())
         return jsonify({"success": True, "message": "Rule intervals saved successfully."}), 200
@@ -1,6 +1,8 @@
 # --- Standard Library Imports ---
 import sqlite3
+import threading
 import uuid
+from collections import defaultdict
 
 # --- Third-Party Imports ---
 from flask import current_app, jsonify, request, render_template
@@ -10,10 +12,34 @@ from . import views_bp
 from .core import hydrus_online_required
 from app_config import load_rules as app_config_load_rules
 from database import (
-    delete_set, get_all_set_data, get_db_connection, remove_rule_from_set, # <-- Already correctly imported
-    save_set_configuration
+    delete_set, delete_sets, get_all_set_data, pooled_connection, remove_rule_from_set,
+    remove_rules_from_sets, save_set_configuration
 )
 from rule_processing.orchestrator import execute_single_rule
+from rule_processing.utils import rule_id_set
+from scheduler_tasks import schedule_rules_tick_job
+
+# --- Helpers ---
+
+# Guards app.config['SET_RULE_INDEX'], the cached set_id -> frozenset(rule_id) map.
+_set_rule_index_lock = threading.RLock()
+
+def _get_set_rule_index(db_conn):
+    """Returns the set membership index, building it from rule_set_associations if it isn't cached."""
+    with _set_rule_index_lock:
+        index = current_app.config.get('SET_RULE_INDEX')
+        if index is None:
+            members = defaultdict(set)
+            for row in db_conn.execute("SELECT set_id, rule_id FROM rule_set_associations"):
+                members[row['set_id']].add(row['rule_id'])
+            index = {set_id: frozenset(rule_ids) for set_id, rule_ids in members.items()}
+            current_app.config['SET_RULE_INDEX'] = index
+        return index
+
+def invalidate_set_rule_index():
+    """Drops the cached set membership index; call after committing any change to set associations."""
+    with _set_rule_index_lock:
+        current_app.config['SET_RULE_INDEX'] = None
 
 # --- Route Handlers ---
 
@@ -26,13 +52,9 @@ def sets_page():
 
 @views_bp.route('/api/v1/sets', methods=['GET'])
 def get_all_sets_route():
-    db_conn = None
-    try:
-        db_conn = get_db_connection()
+    with pooled_connection() as db_conn:
         set_data = get_all_set_data(db_conn)
-        return jsonify({"success": True, "data": set_data}), 200
-    finally:
-        if db_conn: db_conn.close()
+    return jsonify({"success": True, "data": set_data}), 200
 
 @views_bp.route('/api/v1/sets', methods=['POST'])
 def save_sets_route():
@@ -43,97 +65,125 @@ def save_sets_route():
     if not isinstance(data_from_frontend, list):
         return jsonify({"success": False, "message": "Expected a list of set objects."}), 400
 
-    db_conn = None
     try:
         sets_for_db = []
         associations_for_db = []
         for frontend_set in data_from_frontend:
-            for assoc in frontend_set.get('associations', []):
-                associations_for_db.append({"rule_id": assoc['rule_id'], "set_id": frontend_set['id']})
-            
-            set_copy = frontend_set.copy()
-            if 'associations' in set_copy:
-                del set_copy['associations']
-            sets_for_db.append(set_copy)
+            set_id = frontend_set['id']
+            associations_for_db.extend({"rule_id": assoc['rule_id'], "set_id": set_id}
+                                       for assoc in frontend_set.get('associations', []))
+            sets_for_db.append({k: v for k, v in frontend_set.items() if k != 'associations'})
         
         payload_for_db = {"sets": sets_for_db, "associations": associations_for_db}
 
-        db_conn = get_db_connection()
-        save_set_configuration(db_conn, payload_for_db)
+        with pooled_connection() as db_conn:
+            save_set_configuration(db_conn, payload_for_db)
+        invalidate_set_rule_index()
+        # Set intervals may have changed; re-evaluate the tick job and its cached flags.
+        schedule_rules_tick_job(current_app._get_current_object())
         return jsonify({"success": True, "message": "Rule sets saved successfully."}), 200
     except (sqlite3.Error, KeyError) as e:
         return jsonify({"success": False, "message": f"An error occurred while saving: {e}"}), 500
-    finally:
-        if db_conn: db_conn.close()
 
 @views_bp.route('/api/v1/sets/<set_id>', methods=['DELETE'])
 def delete_set_route(set_id):
-    db_conn = None
-    try:
-        db_conn = get_db_connection()
+    with pooled_connection() as db_conn:
         delete_set(db_conn, set_id)
-        return jsonify({"success": True, "message": f"Set {set_id} deleted."}), 200
-    finally:
-        if db_conn: db_conn.close()
+    invalidate_set_rule_index()
+    schedule_rules_tick_job(current_app._get_current_object())
+    return jsonify({"success": True, "message": f"Set {set_id} deleted."}), 200
 
 @views_bp.route('/api/v1/sets/<set_id>/rules/<rule_id>', methods=['DELETE'])
 def remove_rule_from_set_route(set_id, rule_id):
     """Removes a single rule's association from a single set."""
     current_app.logger.info(f"API request to remove rule '{rule_id}' from set '{set_id}'.")
-    db_conn = None
     try:
-        db_conn = get_db_connection()
-        remove_rule_from_set(db_conn, rule_id, set_id) 
+        with pooled_connection() as db_conn:
+            remove_rule_from_set(db_conn, rule_id, set_id)
+        invalidate_set_rule_index()
         return jsonify({"success": True, "message": "Rule removed from set successfully."}), 200
     except sqlite3.Error as e:
         # The DB function handles the Rollback,
         # but we still need to catch the raised exception to send a failure response.
         current_app.logger.error(f"Database error removing rule '{rule_id}' from set '{set_id}': {e}", exc_info=True)
         return jsonify({"success": False, "message": f"Database error: {e}"}), 500
-    finally:
-        if db_conn:
-            db_conn.close()
+
+@views_bp.route('/api/v1/sets/bulk_delete', methods=['POST'])
+def bulk_delete_sets_route():
+    """Deletes every set in the payload's 'ids' list in one transaction."""
+    data = request.get_json(silent=True) or {}
+    set_ids = data.get('ids')
+    if not isinstance(set_ids, list) or not all(isinstance(set_id, str) for set_id in set_ids):
+        return jsonify({"success": False, "message": "Payload must contain an 'ids' list of set IDs."}), 400
+
+    current_app.logger.info(f"API request to delete {len(set_ids)} set(s).")
+    try:
+        with pooled_connection() as db_conn:
+            deleted_count = delete_sets(db_conn, set_ids)
+    except sqlite3.Error as e:
+        current_app.logger.error(f"Database error deleting sets {set_ids}: {e}", exc_info=True)
+        return jsonify({"success": False, "message": f"Database error: {e}"}), 500
+    invalidate_set_rule_index()
+    schedule_rules_tick_job(current_app._get_current_object())
+    return jsonify({"success": True, "message": f"Deleted {deleted_count} set(s).", "deleted_count": deleted_count}), 200
+
+@views_bp.route('/api/v1/sets/bulk_remove_rules', methods=['POST'])
+def bulk_remove_rules_from_sets_route():
+    """Removes every [set_id, rule_id] association in the payload's 'pairs' list in one transaction."""
+    data = request.get_json(silent=True) or {}
+    pairs = data.get('pairs')
+    if not isinstance(pairs, list) or not all(
+            isinstance(pair, list) and len(pair) == 2 and all(isinstance(part, str) for part in pair) for pair in pairs):
+        return jsonify({"success": False, "message": "Payload must contain a 'pairs' list of [set_id, rule_id] pairs."}), 400
+
+    current_app.logger.info(f"API request to remove {len(pairs)} rule/set association(s).")
+    try:
+        with pooled_connection() as db_conn:
+            removed_count = remove_rules_from_sets(db_conn, [(rule_id, set_id) for set_id, rule_id in pairs])
+    except sqlite3.Error as e:
+        current_app.logger.error(f"Database error removing rule/set associations: {e}", exc_info=True)
+        return jsonify({"success": False, "message": f"Database error: {e}"}), 500
+    invalidate_set_rule_index()
+    return jsonify({"success": True, "message": f"Removed {removed_count} rule(s) from sets.", "removed_count": removed_count}), 200
 
 @views_bp.route('/api/v1/run_set/<set_id>', methods=['POST'])
 @hydrus_online_required
 def run_set_route(set_id):
-    parent_run_id = f"manual_set_run_{uuid.uuid4()}"
+    parent_run_id = f"manual_set_run_{uuid.uuid4().hex}"
     current_app.logger.info(f"\n--- Manual Set Trigger: Run ID {parent_run_id[:8]} for Set {set_id[:8]} ---")
-    db_conn = None
     results_per_rule = []
     summary_totals = {'rules_processed': 0, 'rules_with_errors': 0, 'files_matched_by_search': 0,
                       'files_action_attempted_on': 0, 'files_skipped_due_to_override': 0}
 
     try:
         data = request.get_json() or {}
-        override_bypass_list = data.get('override_bypass_list', [])
-        deep_run_list = data.get('deep_run_list', [])
-        db_conn = get_db_connection()
-        all_rules_from_db = app_config_load_rules(db_conn)
+        override_bypass_list = rule_id_set(data.get('override_bypass_list'))
+        deep_run_list = rule_id_set(data.get('deep_run_list'))
+        with pooled_connection() as db_conn:
+            all_rules_from_db = app_config_load_rules(db_conn)
         
-        if set_id == 'all':
-            rules_to_run = all_rules_from_db
-        else:
-            cursor = db_conn.cursor()
-            cursor.execute("SELECT rule_id FROM rule_set_associations WHERE set_id = ?", (set_id,))
-            rule_ids_in_set = {row['rule_id'] for row in cursor.fetchall()}
-            rules_to_run = [rule for rule in all_rules_from_db if rule['id'] in rule_ids_in_set]
-
-        rules_to_run.sort(key=lambda r: r.get('priority', 0))
-        summary_totals['rules_processed'] = len(rules_to_run)
-
-        for i, rule in enumerate(rules_to_run):
-            exec_result = execute_single_rule(
-                app_config=current_app.config, db_conn=db_conn, rule=rule,
-                current_run_id=parent_run_id, execution_order_in_run=i + 1,
-                is_manual_run=True,
-                override_bypass_list=override_bypass_list, deep_run_list=deep_run_list
-            )
-            results_per_rule.append(exec_result)
-            if not exec_result.get('success', False): summary_totals['rules_with_errors'] += 1
-            summary_totals['files_matched_by_search'] += exec_result.get('files_matched_by_search', 0)
-            summary_totals['files_action_attempted_on'] += exec_result.get('files_action_attempted_on', 0)
-            summary_totals['files_skipped_due_to_override'] += exec_result.get('files_skipped_due_to_override', 0)
+            if set_id == 'all':
+                rules_to_run = all_rules_from_db
+            else:
+                rule_ids_in_set = _get_set_rule_index(db_conn).get(set_id, frozenset())
+                rules_to_run = [rule for rule in all_rules_from_db if rule['id'] in rule_ids_in_set]
+
+            # load_rules already returns rules in execution order (priority first), and
+            # filtering keeps that order, so there's nothing to sort here.
+            summary_totals['rules_processed'] = len(rules_to_run)
+
+            for i, rule in enumerate(rules_to_run):
+                exec_result = execute_single_rule(
+                    app_config=current_app.config, db_conn=db_conn, rule=rule,
+                    current_run_id=parent_run_id, execution_order_in_run=i + 1,
+                    is_manual_run=True,
+                    override_bypass_list=override_bypass_list, deep_run_list=deep_run_list
+                )
+                results_per_rule.append(exec_result)
+
+        summary_totals['rules_with_errors'] = sum(1 for r in results_per_rule if not r.get('success', False))
+        for key in ('files_matched_by_search', 'files_action_attempted_on', 'files_skipped_due_to_override'):
+            summary_totals[key] = sum(r.get(key, 0) for r in results_per_rule)
 
         message = f"Set run finished. Processed {summary_totals['rules_processed']} rules."
         return jsonify({"success": True, "message": message, "results_per_rule": results_per_rule, "summary_totals": summary_totals}), 200
@@ -141,6 +191,4 @@ def run_set_route(set_id):
         current_app.logger.error(f"Error in run_set_route for Set {set_id[:8]}: {e}", exc_info=True)
         return jsonify({"success": False, "message": str(e)}), 500
     finally:
-        if db_conn: db_conn.close()
-
         current_app.logger.info(f"--- Manual Set Trigger Finished: Run ID {parent_run_id[:8]} ---")